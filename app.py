@@ -1,6 +1,9 @@
 import streamlit as st
-import pandas as pd
-import joblib
+from utils.debug_panel import render_debug_panel
+from utils.explanations import top_drivers
+from utils.instrumentation import profiled
+from utils.model_registry import get_model_bundle
+from utils.preprocessing import MODEL_FEATURES
 from utils.summary_generator import generate_customer_summary
 from utils.insights_module import insights_page
 
@@ -47,11 +50,6 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# --- Load model, encoder, and data ---
-model = joblib.load("models/xgb_model.pkl")
-encoders = joblib.load("models/label_encoders.pkl")
-df = pd.read_csv("data/Churn_full_2.csv")
-
 # --- Header Layout: Logo + Title ---
 col1, col2 = st.columns([0.25, 0.75])
 with col1:
@@ -143,77 +141,81 @@ with tab1:
 
     # ----- On Submit -----
     if submitted:
-        input_dict = {
-            "Address_Change_Flag": address_change_flag,
-            "VIN_Validated": vin_validated,
-            "Policy_Tenure_Months": policy_tenure,
-            "Coverage_Type": coverage_type,
-            "Deductibles": deductibles,
-            "Has_Multi_Policy": multi_policy,
-            "Loyalty_Program_Enrollment": loyalty_program,
-            "Billing_Method": billing_method,
-            "Payment_Method": payment_method,
-            "Discount_Count": discount_count,
-            "Premium_Change_Percent_Last_Renewal": premium_change,
-            "Late_Payment_Count": late_payments,
-            "Auto_Renew_Enabled": auto_renew,
-            "Claims_Count_Lifetime": claims_lifetime,
-            "At_Fault_Accident_Count": fault_accidents,
-            "Claim_Satisfaction_Score": satisfaction_score,
-            "Interaction_Score": interaction_score,
-            "NPS": nps,
-            "Complaint_Count": complaint_count,
-            "Sentiment_Score": sentiment_score
-        }
-
-        input_df = pd.DataFrame([input_dict])
-        for col in ['Coverage_Type', 'Billing_Method', 'Payment_Method']:
-            encoder = encoders.get(col)
-            if encoder:
-                try:
-                    input_df[col] = encoder.transform(input_df[col])
-                except Exception as e:
-                    st.error(f"Encoding error in column '{col}': {e}")
-
-        churn_score = model.predict_proba(input_df)[0][1]
-        churn_percent = churn_score * 100
-
-        st.markdown("### 📊 Model Results")
-
-        # --- Colored Churn Probability Bar ---
-        if churn_percent >= 80:
-            risk_level = "High"
-            color = "#e63946"
-        elif churn_percent >= 40:
-            risk_level = "Medium"
-            color = "#f4a261"
-        else:
-            risk_level = "Low"
-            color = "#2a9d8f"
-
-        st.markdown(f"""
-        <div style="margin-top: 10px;">
-            <div style="font-weight: 600;">Churn Probability: {churn_percent:.2f}%</div>
-            <div style="height: 24px; width: 100%; background-color: #e0e0e0; border-radius: 8px; overflow: hidden;">
-                <div style="height: 100%; width: {churn_percent}%; background-color: {color}; text-align: center; line-height: 24px; color: white; font-weight: bold;">
-                    {risk_level}
+        with profiled("predict_submit"):
+            input_dict = {
+                "Address_Change_Flag": address_change_flag,
+                "VIN_Validated": vin_validated,
+                "Policy_Tenure_Months": policy_tenure,
+                "Coverage_Type": coverage_type,
+                "Deductibles": deductibles,
+                "Has_Multi_Policy": multi_policy,
+                "Loyalty_Program_Enrollment": loyalty_program,
+                "Billing_Method": billing_method,
+                "Payment_Method": payment_method,
+                "Discount_Count": discount_count,
+                "Premium_Change_Percent_Last_Renewal": premium_change,
+                "Late_Payment_Count": late_payments,
+                "Auto_Renew_Enabled": auto_renew,
+                "Claims_Count_Lifetime": claims_lifetime,
+                "At_Fault_Accident_Count": fault_accidents,
+                "Claim_Satisfaction_Score": satisfaction_score,
+                "Interaction_Score": interaction_score,
+                "NPS": nps,
+                "Complaint_Count": complaint_count,
+                "Sentiment_Score": sentiment_score
+            }
+
+            # Single row: the fast predictor skips DataFrame/DMatrix conversion
+            predictor = get_model_bundle().predictor
+            churn_score = predictor.predict_records([input_dict])[0]
+            drivers = top_drivers(predictor.contributions_records([input_dict])[0], MODEL_FEATURES)
+            churn_percent = churn_score * 100
+
+            st.markdown("### 📊 Model Results")
+
+            # --- Colored Churn Probability Bar ---
+            if churn_percent >= 80:
+                risk_level = "High"
+                color = "#e63946"
+            elif churn_percent >= 40:
+                risk_level = "Medium"
+                color = "#f4a261"
+            else:
+                risk_level = "Low"
+                color = "#2a9d8f"
+
+            st.markdown(f"""
+            <div style="margin-top: 10px;">
+                <div style="font-weight: 600;">Churn Probability: {churn_percent:.2f}%</div>
+                <div style="height: 24px; width: 100%; background-color: #e0e0e0; border-radius: 8px; overflow: hidden;">
+                    <div style="height: 100%; width: {churn_percent}%; background-color: {color}; text-align: center; line-height: 24px; color: white; font-weight: bold;">
+                        {risk_level}
+                    </div>
                 </div>
             </div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
+
+            if churn_percent >= 80:
+                st.error("🚨 High Risk of Churn")
+            elif churn_percent >= 40:
+                st.warning("⚠️ Moderate Risk of Churn")
+            else:
+                st.success("✅ Low Risk of Churn")
 
-        if churn_percent >= 80:
-            st.error("🚨 High Risk of Churn")
-        elif churn_percent >= 40:
-            st.warning("⚠️ Moderate Risk of Churn")
-        else:
-            st.success("✅ Low Risk of Churn")
+            # --- Top Drivers ---
+            st.markdown("<h4 style='text-align:left;'>🔎 Top Churn Drivers</h4>", unsafe_allow_html=True)
+            for feature, value in drivers:
+                arrow = "⬆️ raises" if value > 0 else "⬇️ lowers"
+                st.write(f"**{feature.replace('_', ' ')}** {arrow} churn risk ({value:+.2f})")
 
-        # --- Summary ---
-        summary = generate_customer_summary(input_dict)
-        st.markdown("<h4 style='text-align:left;'>📜 Customer Summary</h4>", unsafe_allow_html=True)
-        st.write(summary)
+            # --- Summary (streamed as it is generated) ---
+            st.markdown("<h4 style='text-align:left;'>📜 Customer Summary</h4>", unsafe_allow_html=True)
+            st.write_stream(generate_customer_summary(input_dict, drivers, stream=True))
 
 # -------------------- TAB 2 -------------------- #
 with tab2:
-    insights_page()
+    with profiled("insights_page"):
+        insights_page()
+
+# Rendered last so it includes this run's timings
+render_debug_panel()
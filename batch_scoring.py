@@ -0,0 +1,69 @@
+import argparse
+import sys
+import time
+import joblib
+import pandas as pd
+from utils.model_registry import ENCODERS_PATH, MODEL_PATH, load_model_file
+from utils.preprocessing import MODEL_FEATURES, CategoryEncoder, preprocess_input
+
+# Usage:
+#   python batch_scoring.py data/Churn_full_2.csv scores.csv --chunksize 100000
+#   python batch_scoring.py data/Churn_full_2.csv - > scores.csv
+
+
+def score_chunks(reader, model, encoders):
+    """Yield a (Customer_ID, Churn_Probability) frame for every input chunk."""
+    for chunk in reader:
+        features = preprocess_input(chunk[MODEL_FEATURES], encoders)
+        churn_probs = model.predict_proba(features)[:, 1]
+        yield pd.DataFrame({
+            "Customer_ID": chunk["Customer_ID"].to_numpy(),
+            "Churn_Probability": churn_probs,
+        })
+
+
+def score_csv(input_path, output, model, encoders, chunksize=100_000, log=sys.stderr):
+    """Score a customer book chunk by chunk, streaming results to `output`.
+
+    Only one chunk is held in memory at a time, so memory stays bounded
+    by `chunksize` regardless of the size of the input file.
+    """
+    reader = pd.read_csv(input_path, usecols=["Customer_ID"] + MODEL_FEATURES, chunksize=chunksize)
+
+    total_rows = 0
+    start = time.perf_counter()
+    output.write("Customer_ID,Churn_Probability\n")
+    for scores in score_chunks(reader, model, encoders):
+        scores.to_csv(output, header=False, index=False)
+        total_rows += len(scores)
+        elapsed = time.perf_counter() - start
+        print(f"Scored {total_rows:,} rows ({total_rows / elapsed:,.0f} rows/sec)", file=log)
+
+    elapsed = time.perf_counter() - start
+    return total_rows, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch churn scoring over a customer book CSV.")
+    parser.add_argument("input", help="CSV shaped like data/Churn_full_2.csv")
+    parser.add_argument("output", help="Output CSV path, or '-' for stdout")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per scoring chunk")
+    parser.add_argument("--model", default=MODEL_PATH, help="Pickled or native (.json/.ubj) XGBoost model")
+    parser.add_argument("--encoders", default=ENCODERS_PATH)
+    args = parser.parse_args(argv)
+
+    model = load_model_file(args.model)
+    encoders = CategoryEncoder(joblib.load(args.encoders))
+
+    if args.output == "-":
+        total_rows, elapsed = score_csv(args.input, sys.stdout, model, encoders, args.chunksize)
+    else:
+        with open(args.output, "w", newline="") as output:
+            total_rows, elapsed = score_csv(args.input, output, model, encoders, args.chunksize)
+
+    rate = total_rows / elapsed if elapsed else float("inf")
+    print(f"✅ Scored {total_rows:,} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
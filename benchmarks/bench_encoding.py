@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.preprocessing import CATEGORICAL_COLUMNS, CategoryEncoder
+
+# Usage: python benchmarks/bench_encoding.py --rows 1000000
+
+
+def legacy_encode(df, encoders):
+    # Previous per-row path from utils/preprocessing.preprocess_input
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        df[col] = df[col].apply(lambda x: x[0] if isinstance(x, list) else x)
+        df[col] = encoders[col].transform(df[col])
+    return df
+
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark categorical encoding paths.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    encoders = joblib.load("models/label_encoders.pkl")
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        col: rng.choice(encoders[col].classes_, size=args.rows) for col in CATEGORICAL_COLUMNS
+    })
+    df_categorical = df.astype("category")
+    category_encoder = CategoryEncoder(encoders)
+
+    # Both paths must agree before timing them
+    expected = legacy_encode(df, encoders)
+    pd.testing.assert_frame_equal(expected, category_encoder.transform(df), check_dtype=False)
+    pd.testing.assert_frame_equal(expected, category_encoder.transform(df_categorical), check_dtype=False)
+
+    legacy = best_of(lambda: legacy_encode(df, encoders), args.repeat)
+    lookup = best_of(lambda: category_encoder.transform(df), args.repeat)
+    categorical = best_of(lambda: category_encoder.transform(df_categorical), args.repeat)
+
+    print(f"Rows: {args.rows:,}")
+    print(f"LabelEncoder + apply:      {legacy * 1000:9.1f} ms")
+    print(f"CategoryEncoder (strings): {lookup * 1000:9.1f} ms  ({legacy / lookup:.1f}x)")
+    print(f"CategoryEncoder (category):{categorical * 1000:9.1f} ms  ({legacy / categorical:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Peak memory and wall time of in-memory vs out-of-core training as the
+# dataset grows. Larger datasets are built by repeating data/Churn_1.csv.
+#
+# Usage: python benchmarks/bench_external_memory.py --scales 1 10 100
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs churn_scoring.py in-process and prints its peak RSS (KiB on Linux)
+RUNNER = """
+import resource, runpy, sys
+sys.argv = ["churn_scoring.py"] + sys.argv[1:]
+runpy.run_path("churn_scoring.py", run_name="__main__")
+print("PEAK_RSS_KB", resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def build_scaled_csv(source, scale, target):
+    """Write `scale` copies of the source rows, streaming so the benchmark itself stays small."""
+    with open(source, encoding="utf-8") as f:
+        header, *rows = f.readlines()
+    with open(target, "w", encoding="utf-8") as out:
+        out.write(header)
+        for _ in range(scale):
+            out.writelines(rows)
+    return len(rows) * scale
+
+
+def run_training(args, output_dir):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", RUNNER, *args, "--output-dir", output_dir],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    peak_kb = int(result.stdout.rsplit("PEAK_RSS_KB", 1)[1].split()[0])
+    return elapsed, peak_kb / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark in-memory vs external-memory training.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--source", default=os.path.join(ROOT, "data", "Churn_1.csv"))
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=100)
+    parser.add_argument("--output", help="Optional JSON file for the results")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="churn_bench_") as tmp:
+        print(f"{'scale':>6} {'rows':>10} {'in-memory':>22} {'external-memory':>22}")
+        for scale in args.scales:
+            data_path = os.path.join(tmp, f"churn_x{scale}.csv")
+            rows = build_scaled_csv(args.source, scale, data_path)
+            output_dir = os.path.join(tmp, "models")
+
+            in_memory = run_training(["--data", data_path], output_dir)
+            external = run_training([
+                "--external-memory", "--data", data_path, "--chunksize", str(args.chunksize),
+                "--max-rounds", str(args.rounds), "--early-stopping-rounds", str(args.rounds),
+            ], output_dir)
+            os.remove(data_path)
+
+            results.append({
+                "scale": scale, "rows": rows,
+                "in_memory_seconds": round(in_memory[0], 2), "in_memory_peak_mb": round(in_memory[1], 1),
+                "external_seconds": round(external[0], 2), "external_peak_mb": round(external[1], 1),
+            })
+            print(f"{scale:>6} {rows:>10,} {in_memory[0]:9.1f}s {in_memory[1]:9.1f} MB "
+                  f"{external[0]:9.1f}s {external[1]:9.1f} MB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
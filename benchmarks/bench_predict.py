@@ -0,0 +1,60 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.data_store import load_dataset
+from utils.fast_predictor import FastPredictor
+from utils.model_registry import get_model_bundle
+from utils.preprocessing import MODEL_FEATURES
+
+# Usage: python benchmarks/bench_predict.py --sizes 1 100 100000
+
+
+def timed(fn, repeat):
+    """Best-of-`repeat` seconds per call, plus the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predict_proba against the fast predictor.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    bundle = get_model_bundle()
+    predictor = FastPredictor(bundle.model, bundle.category_encoder)
+    base = load_dataset()[MODEL_FEATURES]
+    rng = np.random.default_rng(0)
+
+    print(f"{'rows':>8} {'predict_proba':>14} {'fast (frame)':>14} {'fast (records)':>15} {'speedup':>8}")
+    for size in args.sizes:
+        sample = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+        records = sample.to_dict(orient="records")
+        repeat = max(1, args.repeat if size < 10_000 else args.repeat // 10)
+
+        # Current path: encode, then XGBClassifier.predict_proba on a DataFrame
+        slow, expected = timed(lambda: bundle.model.predict_proba(bundle.category_encoder.transform(sample))[:, 1], repeat)
+        fast, from_frame = timed(lambda: predictor.predict_proba(sample), repeat)
+        assert np.array_equal(expected, from_frame), "fast frame path differs from predict_proba"
+
+        if size <= 1_000:
+            fast_records, from_records = timed(lambda: predictor.predict_records(records), repeat)
+            assert np.array_equal(expected, from_records), "fast record path differs from predict_proba"
+            best = min(fast, fast_records)
+            records_ms = f"{fast_records * 1000:13.3f}ms"
+        else:
+            best, records_ms = fast, f"{'-':>15}"
+
+        print(f"{size:>8} {slow * 1000:12.3f}ms {fast * 1000:12.3f}ms {records_ms} {slow / best:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# End-to-end benchmark of the scoring and insights hot paths on synthetic
+# books shaped like data/Churn_full_2.csv, with the LLM replaced by
+# fake_openai_server.py at a configurable latency.
+#
+# Usage:
+#   python benchmarks/bench_suite.py --sizes 1000 100000 --output bench.json
+#   python benchmarks/bench_suite.py --sizes 1000 100000 --baseline bench.json --tolerance 0.25
+#
+# Books are generated once per (size, seed) into data/.bench and reused, so
+# repeated runs time the same data. With --baseline the run exits non-zero
+# when any timing is slower than the baseline by more than --tolerance.
+
+SOURCE_PATH = os.path.join(ROOT, "data", "Churn_full_2.csv")
+BENCH_DIR = os.path.join(ROOT, "data", ".bench")
+SCENARIO_TODAY = pd.Timestamp("2025-06-01")  # fixed, so scenario sizes do not drift between runs
+GENERATE_CHUNK_ROWS = 500_000
+
+
+def synthesize_book(n_rows, path, seed=0, source=SOURCE_PATH):
+    """Write `n_rows` rows resampled from the source book, with fresh Customer_ID/Policy_Number."""
+    base = pd.read_csv(source, dtype=str, keep_default_na=False)
+    rng = np.random.default_rng(seed)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+        for start in range(0, n_rows, GENERATE_CHUNK_ROWS):
+            size = min(GENERATE_CHUNK_ROWS, n_rows - start)
+            chunk = base.iloc[rng.integers(0, len(base), size)].reset_index(drop=True)
+            ids = np.arange(start, start + size)
+            chunk["Customer_ID"] = [f"bench-{seed}-{i:010d}" for i in ids]
+            chunk["Policy_Number"] = [f"policy-{seed}-{i:010d}" for i in ids]
+            chunk.to_csv(out, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+
+
+def book_path(n_rows, seed):
+    path = os.path.join(BENCH_DIR, f"book-{n_rows}-{seed}.csv")
+    if not os.path.exists(path):
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        synthesize_book(n_rows, path, seed)
+    return path
+
+
+def timed(fn, repeat=1):
+    """Best-of-`repeat` seconds, plus the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_book(n_rows, seed, batch_sizes, repeat):
+    from utils.data_store import build_cache, cache_path, source_version
+    from utils.model_registry import get_model_bundle
+    from utils.preprocessing import MODEL_FEATURES
+    from utils.scenario_charts import aggregate_chart
+    from utils.scenario_index import ScenarioIndex
+    from utils.scenarios import SCENARIOS, evaluate_scenarios
+
+    path = book_path(n_rows, seed)
+    bundle = get_model_bundle()
+    results = {}
+
+    # Load: CSV parse + typing + parquet write (cold), then parquet read (warm)
+    target = cache_path(path, source_version(path))
+    results["csv_load"], df = timed(lambda: build_cache(path, target))
+    results["parquet_load"], df = timed(lambda: pd.read_parquet(target, memory_map=True), repeat)
+
+    features = df[MODEL_FEATURES]
+    results["encode"], _ = timed(lambda: bundle.category_encoder.transform(features), repeat)
+
+    rng = np.random.default_rng(seed)
+    for batch_size in batch_sizes:
+        if batch_size > n_rows:
+            continue
+        sample = features.iloc[rng.integers(0, n_rows, batch_size)].reset_index(drop=True)
+        encoded_sample = bundle.category_encoder.transform(sample)
+        batch_repeat = repeat if batch_size <= 10_000 else max(1, repeat // 3)
+        results[f"predict_proba_{batch_size}"], _ = timed(
+            lambda: bundle.model.predict_proba(encoded_sample)[:, 1], batch_repeat
+        )
+        results[f"fast_predict_{batch_size}"], _ = timed(lambda: bundle.predictor.predict_proba(sample), batch_repeat)
+
+    # Scenario filtering: index build (scores the whole book once), then all scenarios in one pass
+    results["scenario_index_build"], index = timed(
+        lambda: ScenarioIndex(df, bundle.model, bundle.category_encoder, bundle.predictor)
+    )
+    results["scenario_filter"], positions = timed(lambda: evaluate_scenarios(index, SCENARIOS, SCENARIO_TODAY), repeat)
+
+    # Chart aggregation for every scenario, bypassing the chart cache
+    def aggregate_all():
+        for scenario in SCENARIOS:
+            aggregate_chart(df.iloc[positions[scenario.key]], scenario.chart, scenario.feature)
+
+    results["chart_aggregate"], _ = timed(aggregate_all, repeat)
+    return {name: round(seconds, 6) for name, seconds in results.items()}
+
+
+def bench_llm(latency, calls, concurrency):
+    """Summary round trips against the local stub; prompts are unique so the summary cache always misses."""
+    from fake_openai_server import default_reply, start_fake_server
+
+    prompts_seen = []
+
+    def reply(messages):
+        prompts_seen.append(json.dumps(messages, sort_keys=True))
+        return default_reply(messages)
+
+    server, url = start_fake_server(latency=latency, reply=reply)
+    os.environ.update({
+        "AZURE_OPENAI_ENDPOINT": url,
+        "AZURE_OPENAI_API_KEY": "bench",
+        "AZURE_OPENAI_API_VERSION": "2024-12-01-preview",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4o",
+        "AZURE_OPENAI_MODEL_NAME": "gpt-4o",
+        "SUMMARY_CACHE_PATH": os.path.join(tempfile.mkdtemp(prefix="churn_bench_"), "summaries.db"),
+    })
+    try:
+        from openai_resourse import configure_endpoint, gather_openai_responses
+        from utils.summary_generator import generate_customer_summary
+
+        # openai_resourse prefers .streamlit/secrets.toml over the environment;
+        # point it at the stub explicitly so a benchmark never spends real quota
+        configure_endpoint(url, "bench", "2024-12-01-preview", "gpt-4o", "gpt-4o")
+
+        # Warm-up: client imports and connection setup are not part of a round trip
+        generate_customer_summary({"Customer_ID": "bench-warmup"})
+        gather_openai_responses([[{"role": "user", "content": "bench warmup"}]])
+
+        # Customer_ID is not a prompt feature, so uniqueness comes from NPS
+        customers = [{"Customer_ID": f"bench-{i}", "NPS": i} for i in range(calls)]
+        del prompts_seen[:]
+        sequential, _ = timed(lambda: [generate_customer_summary(c) for c in customers])
+        # Every summary must have reached the stub with a distinct prompt, or
+        # cache hits would be timed as round trips
+        assert len(prompts_seen) == calls and len(set(prompts_seen)) == calls, "benchmark prompts are not unique"
+        prompts = [[{"role": "user", "content": f"bench concurrent {i}"}] for i in range(concurrency)]
+        concurrent, _ = timed(lambda: gather_openai_responses(prompts))
+    finally:
+        server.shutdown()
+    return {
+        "summary_sequential_per_call": round(sequential / calls, 6),
+        "llm_gather_total": round(concurrent, 6),
+    }
+
+
+def environment():
+    import xgboost
+
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        revision = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "xgboost": xgboost.__version__,
+    }
+
+
+def compare(results, baseline, tolerance, min_delta=0.0):
+    """(name, baseline seconds, current seconds, ratio) for every timing slower than allowed.
+
+    Slowdowns smaller than `min_delta` seconds are ignored; sub-millisecond
+    timings are too noisy to gate on by ratio alone.
+    """
+    regressions = []
+    for group, timings in results.items():
+        for name, seconds in timings.items():
+            previous = baseline.get(group, {}).get(name)
+            if previous and seconds > previous * (1 + tolerance) and seconds - previous > min_delta:
+                regressions.append((f"{group}.{name}", previous, seconds, seconds / previous))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load, encode, predict, scenarios, charts and LLM summaries.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000], help="Book sizes, up to 10,000,000")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Stub LLM latency in seconds")
+    parser.add_argument("--llm-calls", type=int, default=5)
+    parser.add_argument("--llm-concurrency", type=int, default=16)
+    parser.add_argument("--skip-llm", action="store_true")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown, as a fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)  # the model registry and data store use repo-relative paths
+    results = {}
+    for n_rows in args.sizes:
+        print(f"Benchmarking {n_rows:,} rows...", file=sys.stderr)
+        results[f"rows_{n_rows}"] = bench_book(n_rows, args.seed, args.batch_sizes, args.repeat)
+        gc.collect()
+    if not args.skip_llm:
+        results["llm"] = bench_llm(args.llm_latency, args.llm_calls, args.llm_concurrency)
+
+    for group, timings in results.items():
+        print(f"\n{group}")
+        for name, seconds in timings.items():
+            print(f"  {name:<28} {seconds * 1000:12.3f} ms")
+
+    report = {"environment": environment(), "args": vars(args), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms / 1000)
+        for name, previous, current, ratio in regressions:
+            print(f"❌ {name}: {previous * 1000:.3f} ms -> {current * 1000:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.tolerance:.0%}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# Import-time profile of the app's startup modules, using `python -X importtime`.
+#
+# Usage:
+#   python benchmarks/import_profile.py
+#   python benchmarks/import_profile.py --modules utils.insights_module --top 15
+
+DEFAULT_MODULES = ["utils.preprocessing", "utils.summary_generator", "utils.insights_module", "openai_resourse"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile_imports(modules):
+    """Return [(module, self_us, cumulative_us, depth)] for a fresh interpreter importing `modules`."""
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the app's startup modules.")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    rows = profile_imports(args.modules)
+    total_us = sum(self_us for _, self_us, _, _ in rows)
+    print(f"Total import time for {', '.join(args.modules)}: {total_us / 1000:.1f} ms ({len(rows)} modules)\n")
+
+    print("Requested modules (cumulative, includes module-level work such as data loads):")
+    for name, _, cumulative_us, _ in rows:
+        if name in args.modules:
+            print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+    print("\nHeaviest packages (self time summed over submodules):")
+    packages = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".")[0]
+        packages[root] = packages.get(root, 0) + self_us
+    for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,437 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
-import os
 import joblib
+from utils.model_registry import TRAINING_CONFIG_ATTR, load_model_file, publish_model, read_manifest
+from utils.preprocessing import CATEGORICAL_COLUMNS, MODEL_FEATURES, CategoryEncoder
+import xgboost
 from xgboost import XGBClassifier
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import StratifiedKFold, train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import roc_auc_score
 
-# 📥 Step 1: Load data
-df = pd.read_csv("data/Churn_1.csv")    # NEW
-
+# Usage:
+#   python churn_scoring.py                                  # single default model
+#   python churn_scoring.py --search --trials 60 --folds 5 --n-jobs 32 --workers 8
+#   python churn_scoring.py --incremental data/new_policies.csv --rounds 50
+#   python churn_scoring.py --external-memory --data data/full_history.csv --chunksize 500000
 
-# 🎯 Step 2: Define features and target
 target = "Churned"
-features = [
-    'Customer_ID', 'Address_Change_Flag',
-    'VIN_Validated', 'Policy_Tenure_Months', 'Coverage_Type',
-    'Deductibles', 'Has_Multi_Policy', 'Loyalty_Program_Enrollment',
-    'Billing_Method', 'Payment_Method', 'Discount_Count',
-    'Premium_Change_Percent_Last_Renewal', 'Late_Payment_Count', 'Auto_Renew_Enabled',
-    'Claims_Count_Lifetime', 'At_Fault_Accident_Count', 'Claim_Satisfaction_Score',
-    'Interaction_Score', 'NPS', 'Complaint_Count', 'Sentiment_Score'
-]
-
-# 🧹 Step 3: Drop ID and handle missing
-df = df[features + [target]].copy()
-df.drop(columns=["Customer_ID"], inplace=True)
-df.fillna(0, inplace=True)
-
-# 🔣 Step 4: Encode categoricals and save encoders
-encoders = {}
-for col in ['Coverage_Type', 'Billing_Method', 'Payment_Method']:
-    le = LabelEncoder()
-    df[col] = le.fit_transform(df[col])
-    encoders[col] = le
-
-# Save encoders
-os.makedirs("models", exist_ok=True)
-joblib.dump(encoders, "models/label_encoders.pkl")
-print("✅ Encoders saved to models/label_encoders.pkl")
-
-# 📊 Step 5: Train-test split
-X = df.drop(columns=[target])
-y = df[target]
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# ⚙️ Step 6: Train model
-model = XGBClassifier(eval_metric='logloss')
-model.fit(X_train, y_train)
-
-# 📈 Step 7: Evaluate & save
-y_pred_proba = model.predict_proba(X_test)[:, 1]
-print("ROC AUC:", roc_auc_score(y_test, y_pred_proba))
-
-# 💾 Save model
-joblib.dump(model, "models/xgb_model.pkl")
-print("✅ Model saved to models/xgb_model.pkl")
+features = ['Customer_ID'] + MODEL_FEATURES  # shared with the app and scoring service
+
+
+def extend_encoders(encoders, df):
+    """Append genuinely new categories to the fitted encoders; existing codes never move."""
+    added = {}
+    for col in CATEGORICAL_COLUMNS:
+        le = encoders[col]
+        known = set(le.classes_)
+        new_values = [v for v in pd.unique(df[col]) if v not in known]
+        if new_values:
+            le.classes_ = np.concatenate([le.classes_, np.array(new_values, dtype=le.classes_.dtype)])
+            added[col] = new_values
+    return added
+
+
+def load_training_data(path, encoders=None):
+    # 📥 Step 1: Load data
+    df = pd.read_csv(path)
+
+    # 🧹 Step 2: Drop ID and handle missing
+    df = df[features + [target]].copy()
+    df.drop(columns=["Customer_ID"], inplace=True)
+    df.fillna(0, inplace=True)
+
+    # 🔣 Step 3: Encode categoricals
+    if encoders is None:
+        encoders = {}
+        for col in CATEGORICAL_COLUMNS:
+            le = LabelEncoder()
+            df[col] = le.fit_transform(df[col])
+            encoders[col] = le
+    else:
+        # Reuse the served encoders so codes stay stable for the existing model
+        added = extend_encoders(encoders, df)
+        for col, values in added.items():
+            print(f"➕ New {col} categories: {values}")
+        df = CategoryEncoder(encoders).transform(df)
+
+    X = df.drop(columns=[target])
+    y = df[target]
+    return X, y, encoders
+
+
+# --- Hyperparameter search ---
+# Trials run in a process pool; each worker gets the training data once via
+# the pool initializer and an equal share of the n_jobs thread budget.
+
+_trial_data = {}
+
+
+def _init_worker(X, y, threads):
+    _trial_data.update(X=X, y=y, threads=threads)
+
+
+SEARCH_PARAMS = ["max_depth", "learning_rate", "subsample", "colsample_bytree", "min_child_weight", "reg_lambda", "gamma"]
+
+
+def sample_params(rng):
+    return {
+        "max_depth": int(rng.integers(3, 11)),
+        "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.3)))),
+        "subsample": float(rng.uniform(0.6, 1.0)),
+        "colsample_bytree": float(rng.uniform(0.6, 1.0)),
+        "min_child_weight": float(rng.uniform(1, 10)),
+        "reg_lambda": float(np.exp(rng.uniform(np.log(0.1), np.log(10)))),
+        "gamma": float(rng.uniform(0, 5)),
+    }
+
+
+def run_trial(trial_id, params, folds, max_rounds, early_stopping_rounds, seed):
+    """Cross-validated AUC for one parameter set, early-stopped on each validation fold."""
+    X, y, threads = _trial_data["X"], _trial_data["y"], _trial_data["threads"]
+    start = time.perf_counter()
+    aucs, best_rounds = [], []
+    for train_idx, valid_idx in StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y):
+        model = XGBClassifier(
+            **params,
+            n_estimators=max_rounds,
+            tree_method="hist",
+            eval_metric="auc",
+            early_stopping_rounds=early_stopping_rounds,
+            n_jobs=threads,
+            random_state=seed,
+        )
+        model.fit(
+            X.iloc[train_idx], y.iloc[train_idx],
+            eval_set=[(X.iloc[valid_idx], y.iloc[valid_idx])],
+            verbose=False,
+        )
+        aucs.append(roc_auc_score(y.iloc[valid_idx], model.predict_proba(X.iloc[valid_idx])[:, 1]))
+        best_rounds.append(model.best_iteration + 1)
+
+    return {
+        "trial": trial_id,
+        "auc_mean": float(np.mean(aucs)),
+        "auc_std": float(np.std(aucs)),
+        "best_rounds": int(np.mean(best_rounds)),
+        "wall_seconds": round(time.perf_counter() - start, 3),
+        **params,
+    }
+
+
+def search(X, y, trials, folds, n_jobs, workers, max_rounds, early_stopping_rounds, seed):
+    rng = np.random.default_rng(seed)
+    threads = max(1, n_jobs // workers)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y, threads)) as pool:
+        futures = [
+            pool.submit(run_trial, trial_id, sample_params(rng), folds, max_rounds, early_stopping_rounds, seed)
+            for trial_id in range(trials)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"Trial {result['trial']:>3}: AUC {result['auc_mean']:.4f} ± {result['auc_std']:.4f} "
+                  f"({result['best_rounds']} rounds, {result['wall_seconds']:.1f}s)")
+    return pd.DataFrame(results).sort_values("auc_mean", ascending=False).reset_index(drop=True)
+
+
+def save_model(model, encoders, output_dir):
+    # 💾 Save model and encoders together, only once training has finished;
+    # the app switches to the new pair when the manifest is replaced
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = publish_model(model, encoders, output_dir)
+    print(f"✅ Model and encoders saved to {output_dir} (manifest: {manifest_path})")
+
+
+def existing_model_paths(model_dir):
+    """(model path, encoders path) of the current version in `model_dir`."""
+    manifest_path = os.path.join(model_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        _, model_path, encoders_path = read_manifest(manifest_path)
+        return model_path, encoders_path
+    native_path = os.path.join(model_dir, "xgb_model.ubj")
+    model_path = native_path if os.path.exists(native_path) else os.path.join(model_dir, "xgb_model.pkl")
+    return model_path, os.path.join(model_dir, "label_encoders.pkl")
+
+
+# XGBClassifier parameter -> (tree_train_param key, type), as stored in the booster config
+TREE_TRAIN_PARAMS = {
+    "max_depth": ("max_depth", int),
+    "learning_rate": ("eta", float),
+    "subsample": ("subsample", float),
+    "colsample_bytree": ("colsample_bytree", float),
+    "colsample_bylevel": ("colsample_bylevel", float),
+    "colsample_bynode": ("colsample_bynode", float),
+    "min_child_weight": ("min_child_weight", float),
+    "reg_lambda": ("lambda", float),
+    "reg_alpha": ("alpha", float),
+    "gamma": ("gamma", float),
+    "max_delta_step": ("max_delta_step", float),
+    "max_leaves": ("max_leaves", int),
+    "max_bin": ("max_bin", int),
+    "grow_policy": ("grow_policy", str),
+}
+
+
+def trained_params(model):
+    """Hyperparameters the model's trees were grown with.
+
+    A model loaded from JSON/UBJ only reports objective and base_score from
+    get_params(), and its live booster config is reset to defaults, so the
+    parameters come from the config export_native_model stored with it
+    (or the live config of a pickled model). Anything get_params() does
+    report takes precedence. Returns (params, found), where `found` is
+    False if a native model carries no stored config.
+    """
+    booster = model.get_booster()
+    stored = booster.attr(TRAINING_CONFIG_ATTR)
+    config = json.loads(stored or booster.save_config())["learner"]
+    tree = config["gradient_booster"]["tree_train_param"]
+    params = {name: cast(tree[key]) for name, (key, cast) in TREE_TRAIN_PARAMS.items() if key in tree}
+    params["tree_method"] = config["gradient_booster"]["gbtree_train_param"]["tree_method"]
+    params["random_state"] = int(config["generic_param"]["seed"])
+    scale_pos_weight = config["objective"].get("reg_loss_param", {}).get("scale_pos_weight")
+    if scale_pos_weight is not None:
+        params["scale_pos_weight"] = float(scale_pos_weight)
+    params.update({k: v for k, v in model.get_params().items() if v is not None})
+    return params, stored is not None
+
+
+def train_incremental(args):
+    """Continue boosting the current model on newly arrived rows and compare on a holdout.
+
+    New trees are grown with the base model's own hyperparameters (see
+    `trained_params`); only the number of rounds and threads change.
+    """
+    model_path, encoders_path = existing_model_paths(args.model_dir)
+    old_model = load_model_file(model_path)
+    encoders = joblib.load(encoders_path)
+
+    X, y, encoders = load_training_data(args.incremental, encoders=encoders)
+    X_train, X_holdout, y_train, y_holdout = train_test_split(
+        X, y, test_size=args.holdout_size, random_state=args.seed, stratify=y
+    )
+
+    # ⚙️ Add trees on top of the existing booster, keeping its hyperparameters
+    params, found = trained_params(old_model)
+    if not found and model_path.endswith((".json", ".ubj")):
+        print(f"⚠️ {model_path} has no stored training config; new trees use XGBoost's default hyperparameters")
+    params.update(n_estimators=args.rounds, n_jobs=args.n_jobs, early_stopping_rounds=None)
+    model = XGBClassifier(**params)
+    model.fit(X_train, y_train, xgb_model=old_model.get_booster())
+
+    # 📈 Old vs new on rows neither model trained on
+    old_auc = roc_auc_score(y_holdout, old_model.predict_proba(X_holdout)[:, 1])
+    new_auc = roc_auc_score(y_holdout, model.predict_proba(X_holdout)[:, 1])
+    report = {
+        "base_model": model_path,
+        "new_rows": int(len(X)),
+        "holdout_rows": int(len(X_holdout)),
+        "rounds_added": args.rounds,
+        "total_rounds": int(model.get_booster().num_boosted_rounds()),
+        "old_auc": round(float(old_auc), 5),
+        "new_auc": round(float(new_auc), 5),
+        "auc_delta": round(float(new_auc - old_auc), 5),
+    }
+    print(json.dumps(report, indent=2))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    # A model that scores worse on the holdout is only promoted on request
+    worse = new_auc < old_auc
+    promoted = args.force_promote or not worse
+    report["promoted"] = promoted
+    report["forced"] = bool(args.force_promote and worse)
+    with open(os.path.join(args.output_dir, "incremental_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    if not promoted:
+        print("⚠️ New model is worse on the holdout; keeping the current model (--force-promote to override)")
+        return
+    if worse:
+        print(f"⚠️ Promoting a model that is worse on the holdout (AUC {old_auc:.5f} -> {new_auc:.5f})", file=sys.stderr)
+
+    save_model(model, encoders, args.output_dir)
+
+
+# --- Out-of-core training ---
+# Chunks stream from the CSV through the same preprocessing into XGBoost's
+# external-memory DMatrix, so peak memory is set by --chunksize, not file size.
+
+def fit_encoders_streaming(path, chunksize):
+    """Fit the LabelEncoders from one pass over the categorical columns only."""
+    values = {col: set() for col in CATEGORICAL_COLUMNS}
+    for chunk in pd.read_csv(path, usecols=CATEGORICAL_COLUMNS, chunksize=chunksize):
+        for col in CATEGORICAL_COLUMNS:
+            values[col].update(chunk[col].dropna().unique())
+    encoders = {}
+    for col in CATEGORICAL_COLUMNS:
+        le = LabelEncoder()
+        le.fit(np.array(list(values[col]), dtype=object))
+        encoders[col] = le
+    return encoders
+
+
+class ChurnCsvIter(xgboost.DataIter):
+    """Feeds preprocessed float32 chunks of a churn CSV to XGBoost.
+
+    Rows are split into train/holdout by a per-chunk seeded draw, so every
+    pass over the file (XGBoost makes several) sees the same split.
+    """
+
+    def __init__(self, path, encoders, chunksize, split, holdout_size, seed, cache_prefix):
+        self.path = path
+        self.category_encoder = CategoryEncoder(encoders)
+        self.chunksize = chunksize
+        self.split = split
+        self.holdout_size = holdout_size
+        self.seed = seed
+        self.reader = None
+        self.chunk_number = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self.reader is None:
+            self.reader = pd.read_csv(self.path, usecols=MODEL_FEATURES + [target], chunksize=self.chunksize)
+        chunk = next(self.reader, None)
+        if chunk is None:
+            return 0
+
+        holdout = np.random.default_rng((self.seed, self.chunk_number)).random(len(chunk)) < self.holdout_size
+        self.chunk_number += 1
+        chunk = chunk[holdout if self.split == "holdout" else ~holdout].fillna(0)
+
+        features = self.category_encoder.transform(chunk[MODEL_FEATURES])
+        input_data(
+            data=features.to_numpy(dtype=np.float32),
+            label=chunk[target].to_numpy(dtype=np.float32),
+            feature_names=MODEL_FEATURES,
+        )
+        return 1
+
+    def reset(self):
+        self.reader = None
+        self.chunk_number = 0
+
+
+def train_external_memory(args):
+    start = time.perf_counter()
+    # Encoders are saved with the model once training has finished (see save_model)
+    encoders = fit_encoders_streaming(args.data, args.chunksize)
+
+    with tempfile.TemporaryDirectory(prefix="churn_extmem_") as cache_dir:
+        def make_iter(split):
+            return ChurnCsvIter(
+                args.data, encoders, args.chunksize, split, args.holdout_size, args.seed, os.path.join(cache_dir, split)
+            )
+
+        dtrain = xgboost.ExtMemQuantileDMatrix(make_iter("train"), max_bin=256, nthread=args.n_jobs)
+        dholdout = xgboost.ExtMemQuantileDMatrix(make_iter("holdout"), ref=dtrain, nthread=args.n_jobs)
+
+        # ⚙️ Train on the external-memory pages
+        evals_result = {}
+        booster = xgboost.train(
+            {"objective": "binary:logistic", "tree_method": "hist", "eval_metric": "auc", "nthread": args.n_jobs},
+            dtrain,
+            num_boost_round=args.max_rounds,
+            evals=[(dholdout, "holdout")],
+            early_stopping_rounds=args.early_stopping_rounds,
+            evals_result=evals_result,
+            verbose_eval=False,
+        )
+
+        # Round-trip through the native format so the saved model is a regular XGBClassifier
+        native_path = os.path.join(cache_dir, "model.ubj")
+        booster.save_model(native_path)
+        model = load_model_file(native_path)
+
+    # 📈 Holdout AUC at the early-stopped round
+    print("ROC AUC:", evals_result["holdout"]["auc"][booster.best_iteration])
+    print(f"⏱️ Trained out-of-core in {time.perf_counter() - start:.1f}s")
+    save_model(model, encoders, args.output_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the churn model, optionally with a hyperparameter search.")
+    parser.add_argument("--data", default="data/Churn_1.csv")
+    parser.add_argument("--output-dir", default="models")
+    parser.add_argument("--search", action="store_true", help="Run a cross-validated random search")
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count(), help="Total thread budget")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel trials (default: n_jobs // 4)")
+    parser.add_argument("--max-rounds", type=int, default=2000)
+    parser.add_argument("--early-stopping-rounds", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--incremental", metavar="NEW_DATA", help="Warm-start from the current model on new rows")
+    parser.add_argument("--model-dir", default="models", help="Where the current model and encoders live")
+    parser.add_argument("--rounds", type=int, default=50, help="Boosting rounds to add in incremental mode")
+    parser.add_argument("--holdout-size", type=float, default=0.2, help="Holdout fraction in incremental and external-memory modes")
+    parser.add_argument("--force-promote", action="store_true", help="Promote the incremental model even if holdout AUC drops")
+    parser.add_argument("--external-memory", action="store_true", help="Stream the CSV instead of loading it")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows per chunk in external-memory mode")
+    args = parser.parse_args(argv)
+
+    if args.external_memory:
+        train_external_memory(args)
+        return
+
+    if args.incremental:
+        train_incremental(args)
+        return
+
+    X, y, encoders = load_training_data(args.data)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    # 📊 Step 4: Train-test split
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=args.seed)
+
+    # ⚙️ Step 5: Train model
+    if args.search:
+        workers = args.workers or max(1, args.n_jobs // 4)
+        start = time.perf_counter()
+        trials = search(
+            X_train, y_train, args.trials, args.folds, args.n_jobs, workers,
+            args.max_rounds, args.early_stopping_rounds, args.seed,
+        )
+        print(f"🔍 {len(trials)} trials in {time.perf_counter() - start:.1f}s with {workers} workers")
+
+        trial_log = os.path.join(args.output_dir, "search_trials.csv")
+        trials.to_csv(trial_log, index=False)
+        print(f"✅ Trial log saved to {trial_log}")
+
+        best = trials.iloc[0]
+        params = {k: best[k].item() for k in SEARCH_PARAMS}
+        params["max_depth"] = int(params["max_depth"])
+        with open(os.path.join(args.output_dir, "best_params.json"), "w") as f:
+            json.dump({**params, "n_estimators": int(best["best_rounds"]), "cv_auc": best["auc_mean"].item()}, f, indent=2)
+
+        # Refit on the whole training split with the early-stopped round count
+        model = XGBClassifier(
+            **params,
+            n_estimators=int(best["best_rounds"]),
+            tree_method="hist",
+            eval_metric="logloss",
+            n_jobs=args.n_jobs,
+            random_state=args.seed,
+        )
+    else:
+        model = XGBClassifier(eval_metric='logloss', tree_method="hist", n_jobs=args.n_jobs)
+    model.fit(X_train, y_train)
+
+    # 📈 Step 6: Evaluate & save
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    print("ROC AUC:", roc_auc_score(y_test, y_pred_proba))
+
+    save_model(model, encoders, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
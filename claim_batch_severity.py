@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+import numpy as np
+from openai_resourse import aget_openai_response
+from text_severity_detection import delimiter, severity_messages
+
+# Bulk claim triage: streams (DamageDescription, ThirdpartyDescription)
+# records through the summary / injury / damage prompts with bounded
+# parallelism, writing one JSONL line per input record as results arrive.
+# Re-running with the same output file resumes where the last run stopped.
+#
+# Usage:
+#   python claim_batch_severity.py claims.csv results.jsonl --concurrency 16 --id-column Claim_ID
+
+FIELDS = ("DamageDescription", "ThirdpartyDescription")
+
+
+def read_records(path, id_column=None):
+    """Yield (record_id, damage, thirdparty) from a CSV or JSONL file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for number, row in enumerate(rows, start=1):
+            record_id = str(row[id_column]) if id_column else str(number)
+            yield record_id, row.get(FIELDS[0]) or "", row.get(FIELDS[1]) or ""
+
+
+def description_key(damage, thirdparty):
+    normalised = " ".join(damage.split()) + delimiter + " ".join(thirdparty.split())
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()
+
+
+def load_checkpoint(output_path):
+    """Record ids already written, and results by description key for reuse."""
+    done, results = set(), {}
+    if not os.path.exists(output_path):
+        return done, results
+
+    valid_bytes = 0
+    with open(output_path, "rb") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                break  # partial line from a crash mid-write
+            if not line.endswith(b"\n"):
+                break
+            valid_bytes += len(line)
+            done.add(row["record_id"])
+            results[row["key"]] = {k: row[k] for k in ("summary", "injury_severity", "damage_severity")}
+
+    # Drop the torn tail so appended results start on a clean line
+    with open(output_path, "r+b") as f:
+        f.truncate(valid_bytes)
+    return done, results
+
+
+async def classify(damage, thirdparty):
+    summary, injury, damage_severity = await asyncio.gather(
+        *(aget_openai_response(messages) for messages in severity_messages(damage, thirdparty))
+    )
+    return {"summary": summary, "injury_severity": injury, "damage_severity": damage_severity}
+
+
+async def run(input_path, output_path, concurrency=8, id_column=None, log=sys.stderr):
+    done, results = load_checkpoint(output_path)
+    in_flight = {}
+    latencies = []
+    stats = {"records": 0, "skipped": len(done), "deduplicated": 0, "classified": 0, "errors": 0}
+    slots = asyncio.Semaphore(concurrency)
+
+    out = open(output_path, "a", encoding="utf-8")
+
+    def write(record_id, key, damage, thirdparty, result):
+        row = {"record_id": record_id, "key": key, FIELDS[0]: damage, FIELDS[1]: thirdparty, **result}
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+        stats["records"] += 1
+
+    async def classify_timed(key, damage, thirdparty):
+        try:
+            start = time.perf_counter()
+            result = await classify(damage, thirdparty)
+            latencies.append(time.perf_counter() - start)
+            stats["classified"] += 1
+            results[key] = result
+            return result
+        finally:
+            in_flight.pop(key, None)
+            slots.release()
+
+    async def handle(record_id, key, damage, thirdparty, task):
+        try:
+            result = await task
+        except Exception as e:
+            stats["errors"] += 1
+            print(f"Record {record_id} failed: {e}", file=log)
+            return
+        write(record_id, key, damage, thirdparty, result)
+
+    start = time.perf_counter()
+    pending = set()
+    for record_id, damage, thirdparty in read_records(input_path, id_column):
+        if record_id in done:
+            continue
+        key = description_key(damage, thirdparty)
+        if key in results:
+            stats["deduplicated"] += 1
+            write(record_id, key, damage, thirdparty, results[key])
+            continue
+        if key in in_flight:
+            stats["deduplicated"] += 1
+        else:
+            await slots.acquire()  # bounds the number of claims in flight
+            in_flight[key] = asyncio.ensure_future(classify_timed(key, damage, thirdparty))
+        handler = asyncio.ensure_future(handle(record_id, key, damage, thirdparty, in_flight[key]))
+        pending.add(handler)
+        handler.add_done_callback(pending.discard)
+
+    await asyncio.gather(*pending)
+    out.close()
+
+    elapsed = time.perf_counter() - start
+    stats["elapsed_seconds"] = round(elapsed, 3)
+    stats["records_per_second"] = round(stats["records"] / elapsed, 2) if elapsed else 0.0
+    if latencies:
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]).round(3).tolist()
+        stats.update(latency_p50=p50, latency_p90=p90, latency_p99=p99)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk claim severity classification.")
+    parser.add_argument("input", help="CSV or JSONL with DamageDescription and ThirdpartyDescription")
+    parser.add_argument("output", help="JSONL results file; also the resume checkpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="Claims classified in parallel")
+    parser.add_argument("--id-column", default=None, help="Column identifying each claim (default: row number)")
+    args = parser.parse_args(argv)
+
+    stats = asyncio.run(run(args.input, args.output, args.concurrency, args.id_column))
+    print(json.dumps(stats, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Azure OpenAI chat completions endpoint, for
+# exercising the LLM clients without network access or token cost.
+#
+# Usage:
+#   python fake_openai_server.py --port 8001 --latency 0.5 --fail-every 5
+#   python fake_openai_server.py --port 8001 --latency 0.2 --token-delay 0.05
+#   AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8001/ streamlit run app.py
+#
+# Requests with "stream": true are answered as server-sent events, one
+# word-sized chunk every `token_delay` seconds after the initial `latency`.
+
+
+def default_reply(messages):
+    last = messages[-1]["content"] if messages else ""
+    return f"Fake response to: {last[:80]}"
+
+
+def make_handler(
+    latency=0.0, fail_every=0, fail_status=429, reply=default_reply, token_delay=0.0, retry_after="0",
+    stream_error_after=None, stream_drop_after=None,
+):
+    """Request handler class; `calls` and `max_in_flight` on it count what the endpoint saw.
+
+    A streamed reply sends an error event after `stream_error_after` content
+    chunks, or just closes the connection after `stream_drop_after`.
+    """
+    counter = itertools.count(1)
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so client connection pooling is exercised
+        calls = 0
+        in_flight = 0
+        max_in_flight = 0
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client gave up (deadline hit) before the reply
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.split("?")[0].endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                return
+
+            cls = type(self)
+            with lock:
+                call_number = next(counter)
+                cls.calls = call_number
+                cls.in_flight += 1
+                cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+            try:
+                self._complete(request, call_number)
+            finally:
+                with lock:
+                    cls.in_flight -= 1
+
+        def _complete(self, request, call_number):
+            time.sleep(latency)
+
+            if fail_every and call_number % fail_every == 0:
+                headers = {"Retry-After": retry_after} if retry_after is not None else {}
+                self._send_json(fail_status, {"error": {"message": "Injected failure"}}, headers)
+                return
+
+            content = reply(request.get("messages", []))
+            if request.get("stream"):
+                self._send_stream(request, content)
+                return
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "fake"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage(request, content),
+            })
+
+        def _send_stream(self, request, content):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            # The body runs until the connection closes; clients stop reading at [DONE]
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+            def event(choices, **extra):
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "fake"),
+                    "choices": choices,
+                    **extra,
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            events = [event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])]
+            pieces = re.findall(r"\s*\S+", content)
+            events += [event([{"index": 0, "delta": {"content": piece}, "finish_reason": None}]) for piece in pieces]
+            if stream_drop_after is not None:
+                events = events[:1 + stream_drop_after]
+            elif stream_error_after is not None:
+                events = events[:1 + stream_error_after]
+                events.append(f"data: {json.dumps({'error': {'message': 'Injected stream failure'}})}\n\n")
+            else:
+                events.append(event([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    events.append(event([], usage=usage(request, content)))
+                events.append("data: [DONE]\n\n")
+
+            try:
+                for i, text in enumerate(events):
+                    if i and token_delay:
+                        time.sleep(token_delay)
+                    self.wfile.write(text.encode("utf-8"))
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def usage(request, content):
+    return {
+        "prompt_tokens": sum(len(str(m.get("content", "")).split()) for m in request.get("messages", [])),
+        "completion_tokens": len(content.split()),
+        "total_tokens": 0,
+    }
+
+
+def start_fake_server(port=0, **handler_options):
+    """Start the fake endpoint on a background thread; returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(**handler_options))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Azure OpenAI chat completions endpoint.")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--fail-every", type=int, default=0, help="Fail every Nth request (0 = never)")
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--retry-after", default="0", help="Retry-After header sent with injected failures")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", args.port),
+        make_handler(
+            args.latency, args.fail_every, args.fail_status, token_delay=args.token_delay, retry_after=args.retry_after
+        ),
+    )
+    print(f"Fake OpenAI endpoint on http://127.0.0.1:{args.port}/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
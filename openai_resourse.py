@@ -1,6 +1,11 @@
-from langchain_openai import AzureChatOpenAI
 import streamlit as st
+import asyncio
 import os
+import random
+import threading
+import time
+import weakref
+from utils.instrumentation import counters, latencies, record_llm_usage, span
 
 # Try to load from Streamlit secrets first (for Streamlit Cloud)
 try:
@@ -20,19 +25,236 @@ except Exception:
     OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
     OPENAI_MODEL_NAME = os.getenv("AZURE_OPENAI_MODEL_NAME")
 
-# Initialize AzureChatOpenAI
-llm = AzureChatOpenAI(
-    temperature=0.1,
-    deployment_name=OPENAI_DEPLOYMENT_NAME,
-    model_name=OPENAI_MODEL_NAME,
-    azure_endpoint=OPENAI_DEPLOYMENT_ENDPOINT,
-    openai_api_version=OPENAI_API_VERSION,
-    openai_api_key=OPENAI_API_KEY
-)
+# Request limits shared by the sync and async clients
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", 30))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 3))
+OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", 8))
+OPENAI_BACKOFF_SECONDS = float(os.getenv("OPENAI_BACKOFF_SECONDS", 0.5))
+
+# AzureChatOpenAI is built on first use: importing LangChain and the OpenAI
+# SDK costs over a second, which should not land on app cold start.
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm():
+    global _llm
+    with _llm_lock:
+        if _llm is None:
+            from langchain_openai import AzureChatOpenAI
+
+            _llm = AzureChatOpenAI(
+                temperature=0.1,
+                deployment_name=OPENAI_DEPLOYMENT_NAME,
+                model_name=OPENAI_MODEL_NAME,
+                azure_endpoint=OPENAI_DEPLOYMENT_ENDPOINT,
+                openai_api_version=OPENAI_API_VERSION,
+                openai_api_key=OPENAI_API_KEY,
+                timeout=OPENAI_TIMEOUT_SECONDS,
+                max_retries=OPENAI_MAX_RETRIES,
+                stream_usage=True,  # token counts on the last streamed chunk
+            )
+        return _llm
+
+def configure_endpoint(endpoint, api_key, api_version=None, deployment_name=None, model_name=None):
+    """Point the sync and async clients at another endpoint, e.g. fake_openai_server.py.
+
+    Overrides whatever came from Streamlit secrets or the environment.
+    """
+    global OPENAI_DEPLOYMENT_ENDPOINT, OPENAI_API_KEY, OPENAI_API_VERSION, OPENAI_DEPLOYMENT_NAME, OPENAI_MODEL_NAME, _llm
+    with _llm_lock:
+        OPENAI_DEPLOYMENT_ENDPOINT = endpoint
+        OPENAI_API_KEY = api_key
+        OPENAI_API_VERSION = api_version or OPENAI_API_VERSION
+        OPENAI_DEPLOYMENT_NAME = deployment_name or OPENAI_DEPLOYMENT_NAME
+        OPENAI_MODEL_NAME = model_name or OPENAI_MODEL_NAME
+        _llm = None
+        _async_state.clear()
 
 def get_openai_response(messages):
+    counters.incr("llm.calls")
     try:
-        response = llm.invoke(messages)
+        with span("llm"):
+            response = get_llm().invoke(messages)
+        record_llm_usage(getattr(response, "usage_metadata", None))
         return response.content
     except Exception as e:
+        counters.incr("llm.errors")
         return f"Error: {str(e)}"
+
+
+def iter_openai_response(messages):
+    """Yield the response text in pieces as they arrive; errors are raised.
+
+    A stream that ends without a finish reason (the connection dropped) is
+    an error too, so a truncated response is never taken as complete.
+    Time to the first piece is recorded as "llm.first_token", the whole
+    stream as "llm.stream".
+    """
+    counters.incr("llm.calls")
+    start = time.perf_counter()
+    first = True
+    finish_reason = None
+    try:
+        with span("llm.stream"):
+            for chunk in get_llm().stream(messages):
+                record_llm_usage(getattr(chunk, "usage_metadata", None))
+                finish_reason = chunk.response_metadata.get("finish_reason") or finish_reason
+                if not chunk.content:
+                    continue
+                if first:
+                    latencies.record("llm.first_token", time.perf_counter() - start)
+                    first = False
+                yield chunk.content
+            if finish_reason is None:
+                raise ConnectionError("Response stream ended before it was complete")
+    except Exception:
+        counters.incr("llm.errors")
+        raise
+
+
+def stream_openai_response(messages):
+    """Streaming `get_openai_response`: yields text pieces, or a single "Error: ..." on failure.
+
+    A failure after some text has been yielded ends the stream with the error.
+    """
+    try:
+        yield from iter_openai_response(messages)
+    except Exception as e:
+        yield f"Error: {str(e)}"
+
+
+# --- Async client ---
+# One pooled HTTP client and concurrency semaphore per event loop, since
+# neither can be shared safely between loops.
+_async_state = weakref.WeakKeyDictionary()
+
+
+def _get_async_state():
+    loop = asyncio.get_running_loop()
+    state = _async_state.get(loop)
+    if state is None:
+        import httpx
+        import openai
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONCURRENCY,
+                max_keepalive_connections=OPENAI_MAX_CONCURRENCY,
+            ),
+            timeout=OPENAI_TIMEOUT_SECONDS,
+        )
+        client = openai.AsyncAzureOpenAI(
+            azure_endpoint=OPENAI_DEPLOYMENT_ENDPOINT,
+            api_key=OPENAI_API_KEY,
+            api_version=OPENAI_API_VERSION,
+            http_client=http_client,
+            max_retries=0,  # retries are handled below
+        )
+        state = (client, asyncio.Semaphore(OPENAI_MAX_CONCURRENCY))
+        _async_state[loop] = state
+    return state
+
+
+def _is_retryable(error):
+    import openai
+
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error, attempt):
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return OPENAI_BACKOFF_SECONDS * 2 ** attempt * (1 + random.random())
+
+
+async def aget_openai_response(messages, timeout=OPENAI_TIMEOUT_SECONDS, max_retries=OPENAI_MAX_RETRIES):
+    """Async chat completion with bounded concurrency, a deadline and backoff retries.
+
+    `timeout` is the deadline for the whole call including retries. Retries
+    cover timeouts, connection errors, 429 and 5xx responses; anything else,
+    or the last failure, is raised to the caller.
+    """
+    client, semaphore = _get_async_state()
+
+    async def call():
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore:
+                    response = await client.chat.completions.create(
+                        model=OPENAI_DEPLOYMENT_NAME,
+                        messages=messages,
+                        temperature=0.1,
+                    )
+                record_llm_usage(response.usage)
+                return response.choices[0].message.content
+            except Exception as e:
+                if attempt == max_retries or not _is_retryable(e):
+                    raise
+                counters.incr("llm.retries")
+                await asyncio.sleep(_retry_delay(e, attempt))
+
+    counters.incr("llm.calls")
+    try:
+        with span("llm.async"):
+            return await asyncio.wait_for(call(), timeout)
+    except Exception:
+        counters.incr("llm.errors")
+        raise
+
+
+async def agather_openai_responses(messages_list, return_exceptions=False, **kwargs):
+    """Run independent prompts concurrently; results keep the input order."""
+    return await asyncio.gather(
+        *(aget_openai_response(messages, **kwargs) for messages in messages_list),
+        return_exceptions=return_exceptions,
+    )
+
+
+# Sync callers (Streamlit, scripts) share one background loop so the pooled
+# connections survive between calls.
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            # Import the async HTTP stack on the calling thread: a half-imported
+            # httpx must never be visible to a concurrent sync (streaming) request
+            import httpx  # noqa: F401
+
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="openai-async", daemon=True).start()
+        return _loop
+
+
+def run_async(coro):
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+def submit_openai_responses(messages_list, **kwargs):
+    """Start `agather_openai_responses` on the background loop without waiting.
+
+    Returns a `concurrent.futures.Future` whose result is the list of
+    responses, with failures as "Error: ..." strings.
+    """
+    async def gather():
+        results = await agather_openai_responses(messages_list, return_exceptions=True, **kwargs)
+        return [f"Error: {str(r) or type(r).__name__}" if isinstance(r, BaseException) else r for r in results]
+
+    return asyncio.run_coroutine_threadsafe(gather(), _background_loop())
+
+
+def gather_openai_responses(messages_list, **kwargs):
+    """Blocking wrapper around `agather_openai_responses`.
+
+    Failures are returned as "Error: ..." strings, matching `get_openai_response`.
+    """
+    return submit_openai_responses(messages_list, **kwargs).result()
@@ -0,0 +1,244 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+import numpy as np
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from utils.instrumentation import METRICS_WINDOW, PROFILER, latencies as metrics, profiled, snapshot
+from utils.model_registry import get_model_bundle
+from utils.preprocessing import CATEGORICAL_COLUMNS, MODEL_FEATURES
+
+# Low-latency HTTP scoring service, run alongside the Streamlit UI:
+#   uvicorn scoring_service:app --host 0.0.0.0 --port 8000
+#
+#   POST /score         one customer (MODEL_FEATURES fields, optional Customer_ID);
+#                       add ?summary=true for an LLM summary, timed separately
+#   POST /score/batch   {"records": [...]}
+#   GET  /metrics       p50/p99 latency per endpoint and internal stage
+#                       (encode, predict, llm, ...), counters, micro-batch sizes
+#
+# Concurrent /score requests are micro-batched into one booster call.
+# Records are checked against the feature schema before they are queued, so
+# bad input gets a 422 and never reaches a shared batch.
+# With CHURN_PROFILER set, every request is profiled (see utils.instrumentation).
+
+MAX_BATCH_SIZE = int(os.getenv("SCORING_MAX_BATCH_SIZE", 256))
+MAX_BATCH_WAIT_MS = float(os.getenv("SCORING_MAX_BATCH_WAIT_MS", 2))
+SUMMARY_TIMEOUT_SECONDS = float(os.getenv("SCORING_SUMMARY_TIMEOUT_SECONDS", 20))
+
+batch_sizes = deque(maxlen=METRICS_WINDOW)
+
+
+def score_records(records):
+    """Churn probabilities for a list of feature dicts, in one booster call."""
+    bundle = get_model_bundle()
+    return bundle.predictor.predict_records(records), bundle.version
+
+
+class MicroBatcher:
+    """Collects concurrent single-row requests and scores them together."""
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_BATCH_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+
+    async def score(self, record):
+        if self.worker is None:
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self.run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((record, future))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            batch_sizes.append(len(batch))
+            try:
+                start = time.perf_counter()
+                # Prediction releases the GIL, so keep the event loop free while it runs
+                churn_probs, version = await loop.run_in_executor(None, score_records, [r for r, _ in batch])
+                metrics.record("predict_batch", time.perf_counter() - start)
+            except Exception:
+                # Rescore one by one so a failure only rejects the request that caused it
+                for record, future in batch:
+                    try:
+                        churn_probs, version = await loop.run_in_executor(None, score_records, [record])
+                    except Exception as e:
+                        if not future.done():
+                            future.set_exception(e)
+                        continue
+                    if not future.done():
+                        future.set_result((float(churn_probs[0]), version))
+                continue
+            for (_, future), churn_prob in zip(batch, churn_probs):
+                if not future.done():
+                    future.set_result((float(churn_prob), version))
+
+
+batcher = MicroBatcher()
+
+
+class InvalidInput(ValueError):
+    def __init__(self, error, status_code=422, **details):
+        super().__init__(error)
+        self.status_code = status_code
+        self.body = {"error": error, **details}
+
+
+def coerce_record(record):
+    """Record with MODEL_FEATURES coerced to the model schema; raises InvalidInput.
+
+    Numeric features accept numbers or numeric strings, categorical ones a
+    string (or a one-item list); null is passed on as missing.
+    """
+    if not isinstance(record, dict):
+        raise InvalidInput("Record must be a JSON object")
+    missing = [f for f in MODEL_FEATURES if f not in record]
+    if missing:
+        raise InvalidInput("Missing features", missing=missing)
+
+    coerced, invalid = dict(record), {}
+    for feature in MODEL_FEATURES:
+        value = record[feature]
+        if value is None:
+            coerced[feature] = None if feature in CATEGORICAL_COLUMNS else math.nan
+        elif feature in CATEGORICAL_COLUMNS:
+            if isinstance(value, list) and len(value) == 1:
+                value = value[0]
+            if not isinstance(value, str):
+                invalid[feature] = "expected a string"
+            coerced[feature] = value
+        else:
+            try:
+                if isinstance(value, (list, dict)):
+                    raise TypeError
+                coerced[feature] = float(value)
+            except (TypeError, ValueError):
+                invalid[feature] = "expected a number"
+    if invalid:
+        raise InvalidInput("Invalid features", invalid=invalid)
+    return coerced
+
+
+async def read_json(request):
+    try:
+        return await request.json()
+    except ValueError:  # JSONDecodeError, UnicodeDecodeError
+        raise InvalidInput("Malformed JSON body", status_code=400)
+
+
+async def summarize(record):
+    from utils.summary_generator import generate_customer_summary
+
+    start = time.perf_counter()
+    try:
+        summary = await asyncio.wait_for(
+            asyncio.to_thread(generate_customer_summary, {f: record[f] for f in MODEL_FEATURES}),
+            SUMMARY_TIMEOUT_SECONDS,
+        )
+        return {"summary": summary}
+    except Exception as e:
+        return {"summary_error": str(e) or type(e).__name__}
+    finally:
+        metrics.record("summary", time.perf_counter() - start)
+
+
+async def score(request):
+    start = time.perf_counter()
+    try:
+        record = coerce_record(await read_json(request))
+    except InvalidInput as e:
+        return JSONResponse(e.body, status_code=e.status_code)
+
+    try:
+        churn_prob, version = await batcher.score(record)
+    except Exception as e:
+        return JSONResponse({"error": "Scoring failed", "detail": str(e) or type(e).__name__}, status_code=500)
+    metrics.record("score", time.perf_counter() - start)
+    result = {
+        "Customer_ID": record.get("Customer_ID"),
+        "churn_probability": churn_prob,
+        "model_version": version,
+    }
+
+    # The summary is optional and timed on its own; the score never waits on the LLM unless asked
+    if request.query_params.get("summary", "").lower() in ("1", "true", "yes"):
+        result.update(await summarize(record))
+    return JSONResponse(result)
+
+
+async def score_batch(request):
+    start = time.perf_counter()
+    try:
+        body = await read_json(request)
+        records = body.get("records", []) if isinstance(body, dict) else None
+        if not isinstance(records, list):
+            raise InvalidInput("Body must be an object with a \"records\" list")
+    except InvalidInput as e:
+        return JSONResponse(e.body, status_code=e.status_code)
+    for i, record in enumerate(records):
+        try:
+            records[i] = coerce_record(record)
+        except InvalidInput as e:
+            return JSONResponse({**e.body, "index": i}, status_code=e.status_code)
+
+    try:
+        churn_probs, version = await asyncio.get_running_loop().run_in_executor(None, score_records, records)
+    except Exception as e:
+        return JSONResponse({"error": "Scoring failed", "detail": str(e) or type(e).__name__}, status_code=500)
+    metrics.record("score_batch", time.perf_counter() - start)
+    return JSONResponse({
+        "model_version": version,
+        "scores": [
+            {"Customer_ID": record.get("Customer_ID"), "churn_probability": float(churn_prob)}
+            for record, churn_prob in zip(records, churn_probs)
+        ],
+    })
+
+
+async def metrics_endpoint(request):
+    report = snapshot()
+    # Stage spans stay at the top level, as before
+    report.update(report.pop("spans"))
+    if batch_sizes:
+        report["micro_batch_size"] = {
+            "mean": round(float(np.mean(batch_sizes)), 2),
+            "p99": float(np.percentile(batch_sizes, 99)),
+            "max": int(max(batch_sizes)),
+        }
+    return JSONResponse(report)
+
+
+class ProfileMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        with profiled("service" + request.url.path.replace("/", "_")):
+            return await call_next(request)
+
+
+app = Starlette(
+    routes=[
+        Route("/score", score, methods=["POST"]),
+        Route("/score/batch", score_batch, methods=["POST"]),
+        Route("/metrics", metrics_endpoint, methods=["GET"]),
+    ],
+    middleware=[Middleware(ProfileMiddleware)] if PROFILER else [],
+)
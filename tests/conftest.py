@@ -0,0 +1,32 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_openai_server import start_fake_server  # noqa: E402
+import openai_resourse  # noqa: E402
+from utils import summary_cache  # noqa: E402
+
+
+@pytest.fixture
+def fake_llm(monkeypatch, tmp_path):
+    """Start fake_openai_server.py with the given handler options and point the clients at it.
+
+    Returns the server; `server.RequestHandlerClass` carries `calls` and
+    `max_in_flight`. Each test gets its own summary cache.
+    """
+    servers = []
+
+    def start(**handler_options):
+        server, url = start_fake_server(**handler_options)
+        servers.append(server)
+        openai_resourse.configure_endpoint(url, "test", "2024-12-01-preview", "gpt-4o", "gpt-4o")
+        return server
+
+    monkeypatch.setattr(summary_cache, "_cache", summary_cache.SummaryCache(str(tmp_path / "summaries.sqlite")))
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
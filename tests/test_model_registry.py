@@ -0,0 +1,116 @@
+import json
+import os
+import types
+
+import numpy as np
+import pytest
+from xgboost import XGBClassifier
+
+import churn_scoring
+from utils import model_registry
+from utils.model_registry import (
+    TRAINING_CONFIG_ATTR, export_native_model, get_model_bundle, publish_model, read_manifest, swap_model,
+)
+
+
+@pytest.fixture(scope="module")
+def training_data():
+    return churn_scoring.load_training_data("data/Churn_full_2.csv")
+
+
+def train(training_data, n_estimators):
+    X, y, _ = training_data
+    return XGBClassifier(n_estimators=n_estimators, max_depth=3, n_jobs=1).fit(X, y)
+
+
+@pytest.fixture
+def registry(monkeypatch, tmp_path):
+    """A registry following tmp_path/manifest.json, checking for new versions on every call."""
+    stamps = iter(f"20250101-0000{second:02d}" for second in range(60))
+    clock = types.SimpleNamespace(strftime=lambda fmt: next(stamps), monotonic=model_registry.time.monotonic)
+    monkeypatch.setattr(model_registry, "time", clock)  # distinct version names within one second
+    monkeypatch.setattr(model_registry, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(model_registry, "USE_MANIFEST", True)
+    monkeypatch.setattr(model_registry, "RELOAD_CHECK_SECONDS", 0)
+    monkeypatch.setattr(model_registry, "_current", None)
+    return tmp_path
+
+
+def churn(bundle, training_data):
+    return bundle.model.predict_proba(training_data[0])[:, 1]
+
+
+def test_publish_writes_version_then_manifest(registry, training_data):
+    model = train(training_data, 2)
+    manifest_path = publish_model(model, training_data[2], str(registry))
+
+    version, model_path, encoders_path = read_manifest(manifest_path)
+    assert model_path == os.path.join(str(registry), "versions", version, "xgb_model.ubj")
+    assert os.path.exists(model_path) and os.path.exists(encoders_path)
+    for loose in ("xgb_model.ubj", "xgb_model.pkl", "label_encoders.pkl"):
+        assert os.path.exists(registry / loose)
+
+    loaded = model_registry.load_model_file(model_path)
+    assert loaded.get_booster().attr(TRAINING_CONFIG_ATTR) is not None
+    np.testing.assert_allclose(loaded.predict_proba(training_data[0]), model.predict_proba(training_data[0]), rtol=1e-6)
+
+
+def test_old_versions_are_pruned(registry, training_data, monkeypatch):
+    monkeypatch.setattr(model_registry, "VERSIONS_KEPT", 2)
+    model = train(training_data, 2)
+    for _ in range(4):
+        manifest_path = publish_model(model, training_data[2], str(registry))
+    versions = sorted(os.listdir(registry / "versions"))
+    assert len(versions) == 2
+    assert versions[-1] == read_manifest(manifest_path)[0]
+
+
+def test_registry_follows_the_manifest(registry, training_data):
+    publish_model(train(training_data, 2), training_data[2], str(registry))
+    first = get_model_bundle()
+    assert get_model_bundle() is first
+
+    publish_model(train(training_data, 6), training_data[2], str(registry))
+    second = get_model_bundle()
+    assert second.version != first.version
+    assert second.model.get_booster().num_boosted_rounds() == 6
+    assert second.category_encoder is not first.category_encoder
+    assert not np.allclose(churn(second, training_data), churn(first, training_data))
+
+
+def test_no_reload_before_the_check_interval(registry, training_data, monkeypatch):
+    monkeypatch.setattr(model_registry, "RELOAD_CHECK_SECONDS", 3600)
+    publish_model(train(training_data, 2), training_data[2], str(registry))
+    first = get_model_bundle()
+    publish_model(train(training_data, 6), training_data[2], str(registry))
+    assert get_model_bundle() is first
+
+
+def test_swap_model_pins_the_registry_to_files(registry, training_data):
+    publish_model(train(training_data, 2), training_data[2], str(registry))
+    get_model_bundle()
+
+    pinned_dir = registry / "pinned"
+    pinned_dir.mkdir()
+    export_native_model(train(training_data, 4), str(pinned_dir / "xgb_model.ubj"))
+    model_registry.dump_atomic(training_data[2], str(pinned_dir / "label_encoders.pkl"))
+    swapped = swap_model(str(pinned_dir / "xgb_model.ubj"), str(pinned_dir / "label_encoders.pkl"))
+    assert swapped.manifest_path is None
+    assert get_model_bundle() is swapped
+
+    # A later publish no longer moves a pinned registry
+    publish_model(train(training_data, 6), training_data[2], str(registry))
+    assert get_model_bundle() is swapped
+
+
+def test_manifest_paths_are_relative_to_the_manifest(tmp_path):
+    manifest = {"version": "v1", "model": "versions/v1/xgb_model.ubj", "encoders": "versions/v1/label_encoders.pkl"}
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest))
+    version, model_path, encoders_path = read_manifest(str(tmp_path / "manifest.json"))
+    assert (version, model_path) == ("v1", os.path.join(str(tmp_path), "versions/v1/xgb_model.ubj"))
+    assert encoders_path == os.path.join(str(tmp_path), "versions/v1/label_encoders.pkl")
+
+
+def test_native_export_rejects_other_formats(tmp_path, training_data):
+    with pytest.raises(ValueError):
+        export_native_model(train(training_data, 1), str(tmp_path / "model.pkl"))
@@ -0,0 +1,95 @@
+import time
+import openai
+import pytest
+import openai_resourse
+from openai_resourse import aget_openai_response, gather_openai_responses, run_async
+from utils.instrumentation import counters
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def call(**kwargs):
+    return run_async(aget_openai_response(MESSAGES, **kwargs))
+
+
+def retries():
+    return counters.snapshot().get("llm.retries", 0)
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_status_is_retried(fake_llm, status):
+    # Every second request fails: the first call succeeds, the second needs one retry
+    server = fake_llm(fail_every=2, fail_status=status)
+    before = retries()
+
+    assert call(max_retries=2) == "Fake response to: hello"
+    assert call(max_retries=2) == "Fake response to: hello"
+    assert server.RequestHandlerClass.calls == 3
+    assert retries() - before == 1
+
+
+def test_non_retryable_status_raises_immediately(fake_llm):
+    server = fake_llm(fail_every=1, fail_status=400)
+
+    with pytest.raises(openai.BadRequestError):
+        call(max_retries=3)
+    assert server.RequestHandlerClass.calls == 1
+
+
+def test_gives_up_after_max_retries(fake_llm):
+    server = fake_llm(fail_every=1, fail_status=429)
+
+    with pytest.raises(openai.RateLimitError):
+        call(max_retries=2)
+    assert server.RequestHandlerClass.calls == 3
+
+
+def test_retry_after_header_sets_the_delay(fake_llm, monkeypatch):
+    # Backoff would wait at least 5s; the header asks for 0.3s
+    monkeypatch.setattr(openai_resourse, "OPENAI_BACKOFF_SECONDS", 5.0)
+    fake_llm(fail_every=2, fail_status=429, retry_after="0.3")
+    call(max_retries=1)
+
+    start = time.perf_counter()
+    assert call(max_retries=1) == "Fake response to: hello"
+    assert 0.3 <= time.perf_counter() - start < 2.0
+
+
+def test_deadline_covers_a_slow_response(fake_llm):
+    fake_llm(latency=2.0)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        call(timeout=0.3, max_retries=0)
+    assert time.perf_counter() - start < 1.5
+
+
+def test_deadline_covers_retries(fake_llm):
+    server = fake_llm(fail_every=1, fail_status=503, retry_after="0.2")
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        call(timeout=0.5, max_retries=100)
+    assert time.perf_counter() - start < 1.5
+    assert 2 <= server.RequestHandlerClass.calls < 10
+
+
+def test_concurrency_is_bounded_by_the_semaphore(fake_llm, monkeypatch):
+    monkeypatch.setattr(openai_resourse, "OPENAI_MAX_CONCURRENCY", 2)
+    server = fake_llm(latency=0.2)  # also drops the clients built with the old limit
+
+    prompts = [[{"role": "user", "content": f"prompt {i}"}] for i in range(6)]
+    start = time.perf_counter()
+    responses = gather_openai_responses(prompts)
+
+    assert responses == [f"Fake response to: prompt {i}" for i in range(6)]
+    assert server.RequestHandlerClass.max_in_flight == 2
+    assert time.perf_counter() - start >= 0.6
+
+
+def test_gather_returns_errors_in_place(fake_llm):
+    fake_llm(fail_every=2, fail_status=400)
+
+    responses = gather_openai_responses([MESSAGES, MESSAGES], max_retries=0)
+
+    assert sorted(r.startswith("Error:") for r in responses) == [False, True]
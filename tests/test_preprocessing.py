@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder
+
+from utils.preprocessing import CATEGORICAL_COLUMNS, CategoryEncoder, preprocess_input
+
+CLASSES = {
+    "Coverage_Type": ["Collision", "Comprehensive", "Liability"],
+    "Billing_Method": ["Auto-Pay", "Manual"],
+    "Payment_Method": ["ACH", "Card", "Check"],
+}
+
+
+@pytest.fixture
+def encoders():
+    return {col: LabelEncoder().fit(CLASSES[col]) for col in CATEGORICAL_COLUMNS}
+
+
+def test_codes_match_label_encoder(encoders):
+    values = pd.Series(["Liability", "Collision", "Comprehensive", "Collision"])
+    codes = CategoryEncoder(encoders).encode_column("Coverage_Type", values)
+    assert codes.tolist() == encoders["Coverage_Type"].transform(values).tolist()
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_unknown_and_missing_become_nan(encoders, categorical):
+    values = pd.Series(["Card", "Crypto", None, np.nan, "ACH"])
+    if categorical:
+        values = values.astype("category")
+    codes = CategoryEncoder(encoders).encode_column("Payment_Method", values)
+    assert codes[[0, 4]].tolist() == [1.0, 0.0]
+    assert np.isnan(codes[[1, 2, 3]]).all()
+
+
+def test_categorical_dtype_with_unused_categories(encoders):
+    values = pd.Categorical(["Manual", "Auto-Pay"], categories=["Paper", "Manual", "Auto-Pay"])
+    codes = CategoryEncoder(encoders).encode_column("Billing_Method", pd.Series(values))
+    assert codes.tolist() == [1, 0]
+
+
+def test_custom_unknown_value(encoders):
+    codes = CategoryEncoder(encoders, unknown_value=-1).encode_column("Billing_Method", pd.Series(["Manual", "Paper"]))
+    assert codes.tolist() == [1, -1]
+
+
+def test_list_values_are_flattened(encoders):
+    values = pd.Series([["Auto-Pay"], "Manual"], dtype=object)
+    codes = CategoryEncoder(encoders).encode_column("Billing_Method", values)
+    assert codes.tolist() == [0, 1]
+
+
+def test_transform_leaves_input_and_other_columns_untouched(encoders):
+    df = pd.DataFrame({"Coverage_Type": ["Liability", "Unknown"], "NPS": [3, 9]})
+    out = preprocess_input(df, encoders)
+    assert df["Coverage_Type"].tolist() == ["Liability", "Unknown"]
+    assert out["Coverage_Type"].iloc[0] == 2 and np.isnan(out["Coverage_Type"].iloc[1])
+    assert out["NPS"].tolist() == [3, 9]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_store import apply_dtypes
+from utils.preprocessing import CategoryEncoder
+from utils.scenario_index import INDEXED_COLUMNS, ScenarioIndex
+
+
+class RowModel:
+    """Churn probability taken from NPS, so scores are known without a trained model."""
+
+    def predict_proba(self, X):
+        churn = X["NPS"].to_numpy(dtype=float) / 10
+        return np.column_stack([1 - churn, churn])
+
+
+@pytest.fixture(scope="module")
+def index():
+    df = apply_dtypes(pd.read_csv("data/Churn_full_2.csv"))
+    # Some missing values, which must never match a range
+    df.loc[df.index[::37], "Late_Payment_Count"] = np.nan
+    df.loc[df.index[::41], "Claim_Closed_Date"] = pd.NaT
+    return ScenarioIndex(df, RowModel(), CategoryEncoder({}))
+
+
+def mask_positions(values, lower, upper, include_lower, include_upper):
+    mask = values.notna()
+    if lower is not None:
+        mask &= values >= lower if include_lower else values > lower
+    if upper is not None:
+        mask &= values <= upper if include_upper else values < upper
+    return np.flatnonzero(mask.to_numpy())
+
+
+def bounds(values, column):
+    """Bounds at, between and beyond the observed values of `column`."""
+    present = np.sort(values.dropna().unique())
+    picks = [present[0], present[len(present) // 3], present[len(present) // 2], present[-1]]
+    if column.endswith("_Date"):
+        picks += [present[0] - pd.Timedelta(days=1), present[-1] + pd.Timedelta(days=1), present[5] + pd.Timedelta(hours=6)]
+    else:
+        picks += [present[0] - 1, present[-1] + 1, (present[1] + present[2]) / 2]
+    return [None] + [pd.Timestamp(p) if column.endswith("_Date") else p for p in picks]
+
+
+@pytest.mark.parametrize("column", INDEXED_COLUMNS)
+@pytest.mark.parametrize("include_lower", [True, False])
+@pytest.mark.parametrize("include_upper", [True, False])
+def test_range_matches_mask(index, column, include_lower, include_upper):
+    values = index.frame[column]
+    for lower in bounds(values, column):
+        for upper in bounds(values, column):
+            got = index.range(column, lower, upper, include_lower, include_upper)
+            expected = mask_positions(values, lower, upper, include_lower, include_upper)
+            np.testing.assert_array_equal(got, expected, err_msg=f"{column} {lower!r}..{upper!r}")
+
+
+def test_inverted_range_is_empty(index):
+    assert len(index.range("Late_Payment_Count", lower=5, upper=1)) == 0
+
+
+def test_churn_scores_and_lowest_retention(index):
+    nps = index.frame["NPS"].to_numpy(dtype=float)
+    np.testing.assert_allclose(index.churn_probs, nps / 10)
+
+    positions = index.range("Late_Payment_Count", lower=0, include_lower=False)
+    lowest = index.lowest_retention(positions, n=5)
+    assert set(lowest) <= set(positions)
+    worst = np.sort(index.churn_probs[positions])[::-1][:5]
+    np.testing.assert_allclose(index.churn_probs[lowest], worst)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_store import apply_dtypes
+from utils.preprocessing import CategoryEncoder
+from utils.scenario_index import ScenarioIndex
+from utils.scenarios import SCENARIOS, evaluate_scenarios, get_scenario_positions
+
+TODAY = pd.Timestamp("2025-06-01")
+SCENARIOS_BY_KEY = {scenario.key: scenario for scenario in SCENARIOS}
+
+
+class ConstantModel:
+    def predict_proba(self, X):
+        return np.full((len(X), 2), 0.5)
+
+
+def index_with_dates(column, offsets):
+    """A ScenarioIndex whose `column` holds TODAY + each day offset (None for NaT)."""
+    df = apply_dtypes(pd.read_csv("data/Churn_full_2.csv", nrows=len(offsets)))
+    df[column] = [pd.NaT if days is None else TODAY + pd.Timedelta(days=days) for days in offsets]
+    return ScenarioIndex(df, ConstantModel(), CategoryEncoder({}))
+
+
+def positions(index, key, today=TODAY):
+    return evaluate_scenarios(index, [SCENARIOS_BY_KEY[key]], today)[key].tolist()
+
+
+def test_claims_closed_window_excludes_day_minus_90():
+    # Baseline: closed >= now - 90 days and <= now, with `now` later than midnight
+    offsets = [-91, -90, -89, -1, 0, 1, None]
+    index = index_with_dates("Claim_Closed_Date", offsets)
+    assert [offsets[p] for p in positions(index, "claims")] == [-89, -1, 0]
+
+
+def test_policy_expiry_window_starts_tomorrow_and_includes_day_90():
+    offsets = [-1, 0, 1, 89, 90, 91, None]
+    index = index_with_dates("Policy_Expiry_Date", offsets)
+    assert [offsets[p] for p in positions(index, "policy")] == [1, 89, 90]
+
+
+@pytest.mark.parametrize("hour", [1, 12, 23])
+def test_date_windows_match_baseline_time_of_day_filters(hour):
+    offsets = list(range(-95, 96)) + [None]
+    now = TODAY + pd.Timedelta(hours=hour)
+    for column, key, baseline in [
+        ("Claim_Closed_Date", "claims", lambda d: (d >= now - pd.Timedelta(days=90)) & (d <= now)),
+        ("Policy_Expiry_Date", "policy", lambda d: (d > now) & (d <= now + pd.Timedelta(days=90))),
+    ]:
+        index = index_with_dates(column, offsets)
+        expected = np.flatnonzero(baseline(index.frame[column]).to_numpy()).tolist()
+        assert positions(index, key) == expected
+
+
+def test_positions_are_cached_per_day():
+    index = index_with_dates("Claim_Closed_Date", [-1, 0])
+    first = get_scenario_positions(index, SCENARIOS, TODAY)
+    assert get_scenario_positions(index, SCENARIOS, TODAY) is first
+    assert get_scenario_positions(index, SCENARIOS, TODAY + pd.Timedelta(days=1)) is not first
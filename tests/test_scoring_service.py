@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pandas as pd
+import pytest
+
+import scoring_service
+from utils.model_registry import get_model_bundle
+from utils.preprocessing import MODEL_FEATURES
+
+
+@pytest.fixture(scope="module")
+def records():
+    rows = pd.read_csv("data/Churn_full_2.csv", nrows=8)
+    features = rows[["Customer_ID"] + MODEL_FEATURES].astype(object)
+    return features.where(features.notna(), None).to_dict("records")
+
+
+@pytest.fixture(autouse=True)
+def batcher(monkeypatch):
+    # The module batcher's queue belongs to the first event loop that used it
+    batcher = scoring_service.MicroBatcher(max_wait_ms=50)
+    monkeypatch.setattr(scoring_service, "batcher", batcher)
+    return batcher
+
+
+def post_all(*requests):
+    """POST each (path, kwargs) concurrently to the app; returns the responses in order."""
+    async def run():
+        transport = httpx.ASGITransport(app=scoring_service.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+            return await asyncio.gather(*(client.post(path, **kwargs) for path, kwargs in requests))
+    return asyncio.run(run())
+
+
+def test_score_matches_predictor(records):
+    (response,) = post_all(("/score", {"json": records[0]}))
+    assert response.status_code == 200
+    body = response.json()
+    bundle = get_model_bundle()
+    assert body["Customer_ID"] == records[0]["Customer_ID"]
+    assert body["model_version"] == bundle.version
+    assert body["churn_probability"] == pytest.approx(float(bundle.predictor.predict_records(records[:1])[0]))
+
+
+def test_concurrent_requests_share_a_batch(records):
+    start = len(scoring_service.batch_sizes)
+    responses = post_all(*(("/score", {"json": record}) for record in records))
+    assert [r.status_code for r in responses] == [200] * len(records)
+    assert max(list(scoring_service.batch_sizes)[start:]) > 1
+    expected = get_model_bundle().predictor.predict_records(records)
+    assert [r.json()["churn_probability"] for r in responses] == pytest.approx(expected.tolist())
+
+
+def test_malformed_json_is_400():
+    (response,) = post_all(("/score", {"content": b"{not json"}))
+    assert response.status_code == 400
+    assert response.json() == {"error": "Malformed JSON body"}
+
+
+@pytest.mark.parametrize("change, error, detail", [
+    (lambda r: [r], "Record must be a JSON object", {}),
+    (lambda r: {k: v for k, v in r.items() if k != "NPS"}, "Missing features", {"missing": ["NPS"]}),
+    (lambda r: dict(r, Deductibles="n/a"), "Invalid features", {"invalid": {"Deductibles": "expected a number"}}),
+    (lambda r: dict(r, Coverage_Type=3), "Invalid features", {"invalid": {"Coverage_Type": "expected a string"}}),
+])
+def test_invalid_record_is_422(records, change, error, detail):
+    (response,) = post_all(("/score", {"json": change(records[0])}))
+    assert response.status_code == 422
+    assert response.json() == {"error": error, **detail}
+
+
+def test_coercion_accepts_strings_nulls_and_single_item_lists(records):
+    record = dict(records[0], Deductibles="500", NPS=None, Payment_Method=["Card"])
+    coerced = scoring_service.coerce_record(record)
+    assert coerced["Deductibles"] == 500.0 and coerced["Payment_Method"] == "Card"
+    assert coerced["NPS"] != coerced["NPS"]  # NaN
+    (response,) = post_all(("/score", {"json": record}))
+    assert response.status_code == 200
+
+
+def test_batch_rejects_the_first_bad_record_with_its_index(records):
+    bad = dict(records[1], Late_Payment_Count={"n": 1})
+    responses = post_all(
+        ("/score/batch", {"json": {"records": [records[0], bad]}}),
+        ("/score/batch", {"json": [records[0]]}),
+        ("/score/batch", {"content": b"records"}),
+    )
+    assert [r.status_code for r in responses] == [422, 422, 400]
+    assert responses[0].json()["index"] == 1
+
+
+def test_batch_scores_in_order(records):
+    (response,) = post_all(("/score/batch", {"json": {"records": records}}))
+    assert response.status_code == 200
+    scores = response.json()["scores"]
+    assert [s["Customer_ID"] for s in scores] == [r["Customer_ID"] for r in records]
+
+
+def test_failing_record_does_not_fail_its_batch(records, monkeypatch):
+    score_records = scoring_service.score_records
+
+    def fail_on_poison(batch):
+        if any(record.get("Customer_ID") == "poison" for record in batch):
+            raise RuntimeError("poison")
+        return score_records(batch)
+
+    monkeypatch.setattr(scoring_service, "score_records", fail_on_poison)
+    requests = [("/score", {"json": record}) for record in records[:3]]
+    requests.insert(1, ("/score", {"json": dict(records[3], Customer_ID="poison")}))
+    responses = post_all(*requests)
+    assert [r.status_code for r in responses] == [200, 500, 200, 200]
+    assert responses[1].json() == {"error": "Scoring failed", "detail": "poison"}
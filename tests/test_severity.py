@@ -0,0 +1,104 @@
+import json
+
+import pytest
+
+import text_severity_detection
+from utils import severity_classifier
+from utils.severity_classifier import load_training_data, normalise_label, predict_severity, train_classifier
+
+DAMAGE = "Rear bumper scratched in a car park"
+THIRDPARTY = "Other driver reversed into the parked car"
+
+TRAINING = [
+    ("Car completely burnt out after engine fire", "Fire spread from the engine bay", "Total Loss"),
+    ("Vehicle crushed and written off by the insurer", "Lorry rolled onto the car", "Total Loss"),
+    ("Small scratch on the rear bumper", "Light contact while parking", "Minor"),
+    ("Scuffed wing mirror", "Touched mirrors passing in a narrow lane", "Minor"),
+    ("No visible damage to either car", "Drivers exchanged details, nothing broken", "No Damage"),
+    ("Inspection found no damage at all", "Nothing was damaged", "No Damage"),
+    ("Policy holder asked about renewal prices", "Question about the premium", "Irrelevant"),
+    ("Customer wants to change their address", "Admin request about the account", "Irrelevant"),
+]
+
+
+@pytest.fixture
+def classifier():
+    texts = [severity_classifier.claim_text(d, t) for d, t, _ in TRAINING]
+    return train_classifier(texts * 3, [label for _, _, label in TRAINING] * 3)
+
+
+@pytest.fixture
+def local_severity(monkeypatch):
+    """Make the local classifier answer `severity` with the given confidence."""
+    def set_prediction(severity, confidence):
+        monkeypatch.setattr(text_severity_detection, "predict_severity", lambda d, t: (severity, confidence))
+    return set_prediction
+
+
+@pytest.mark.parametrize("raw, label", [
+    ("**Minor.**", "Minor"),
+    ("total loss", "Total Loss"),
+    (" Severe\n", "Severe"),
+    ("No Damage.", "No Damage"),
+    ("irrelevant", "Irrelevant"),
+    ("Catastrophic", None),
+    ("", None),
+])
+def test_normalise_label(raw, label):
+    assert normalise_label(raw) == label
+
+
+def test_training_data_keeps_non_grade_outcomes(tmp_path):
+    path = tmp_path / "results.jsonl"
+    rows = [
+        {"key": "a", "DamageDescription": "dent", "ThirdpartyDescription": "", "damage_severity": "**Moderate**"},
+        {"key": "b", "DamageDescription": "nothing", "ThirdpartyDescription": "", "damage_severity": "No Damage"},
+        {"key": "c", "DamageDescription": "renewal", "ThirdpartyDescription": "", "damage_severity": "irrelevant"},
+        {"key": "a", "DamageDescription": "dent", "ThirdpartyDescription": "", "damage_severity": "Moderate"},
+        {"key": "d", "DamageDescription": "dent", "ThirdpartyDescription": "", "damage_severity": "unsure"},
+    ]
+    path.write_text("\n".join(json.dumps(row) for row in rows) + "\nnot json\n", encoding="utf-8")
+    texts, labels = load_training_data([str(path)])
+    assert labels == ["Moderate", "No Damage", "Irrelevant"]
+    assert len(texts) == 3
+
+
+def test_predict_severity_with_classifier(classifier):
+    label, confidence = predict_severity("No visible damage to either car", "nothing broken", classifier)
+    assert label == "No Damage"
+    assert 0.0 < confidence <= 1.0
+    assert set(classifier.classes_) <= set(severity_classifier.SEVERITY_CLASSES)
+
+
+def test_predict_severity_without_classifier(monkeypatch, tmp_path):
+    monkeypatch.setattr(severity_classifier, "CLASSIFIER_PATH", str(tmp_path / "missing.pkl"))
+    monkeypatch.setattr(severity_classifier, "_classifier", None)
+    monkeypatch.setattr(severity_classifier, "_loaded", False)
+    assert predict_severity(DAMAGE, THIRDPARTY) == (None, 0.0)
+
+
+def test_confident_prediction_skips_llm(fake_llm, local_severity):
+    server = fake_llm()
+    local_severity("No Damage", 0.95)
+    result = text_severity_detection.damage_severity_prediction(DAMAGE, THIRDPARTY, confidence_threshold=0.8)
+    assert result == {"damage_severity": "No Damage", "confidence": 0.95, "source": "local"}
+    assert server.RequestHandlerClass.calls == 0
+
+
+@pytest.mark.parametrize("severity, confidence", [("Minor", 0.5), (None, 0.0)])
+def test_unsure_prediction_falls_back_to_llm(fake_llm, local_severity, severity, confidence):
+    server = fake_llm(reply=lambda messages: "Minor")
+    local_severity(severity, confidence)
+    result = text_severity_detection.damage_severity_prediction(DAMAGE, THIRDPARTY, confidence_threshold=0.8)
+    assert result == {"damage_severity": "Minor", "confidence": confidence, "source": "llm"}
+    assert server.RequestHandlerClass.calls == 1
+
+
+@pytest.mark.parametrize("confidence, source, calls", [(0.95, "local", 2), (0.5, "llm", 3)])
+def test_claim_prediction_sends_damage_prompt_only_when_unsure(fake_llm, local_severity, confidence, source, calls):
+    server = fake_llm(reply=lambda messages: "Major")
+    local_severity("Irrelevant", confidence)
+    result = text_severity_detection.severity_OpenAI_prediction(DAMAGE, THIRDPARTY, confidence_threshold=0.8)
+    assert result["damage_severity_source"] == source
+    assert result["damage_severity"] == ("Irrelevant" if source == "local" else "Major")
+    assert server.RequestHandlerClass.calls == calls
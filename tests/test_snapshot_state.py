@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.model_registry import get_model_bundle
+from utils.snapshot_state import ScoreHistory, SnapshotState
+
+
+@pytest.fixture(scope="module")
+def predictor():
+    return get_model_bundle().predictor
+
+
+@pytest.fixture
+def book():
+    return pd.read_csv("data/Churn_full_2.csv", nrows=20)
+
+
+def test_history_keeps_the_last_depth_entries_oldest_first():
+    history = ScoreHistory(capacity=2, depth=3)
+    for snapshot in range(5):
+        history.append(np.array([0]), snapshot, np.array([snapshot / 10]))
+    history.append(np.array([1]), 4, np.array([0.9]))
+
+    snapshots, scores = history.trajectory(0)
+    assert snapshots.tolist() == [2, 3, 4]
+    np.testing.assert_allclose(scores, [0.2, 0.3, 0.4], rtol=1e-6)
+    assert history.trajectory(1)[0].tolist() == [4]
+
+
+def test_history_reserve_keeps_existing_entries():
+    history = ScoreHistory(capacity=1, depth=2)
+    history.append(np.array([0]), 0, np.array([0.5]))
+    history.reserve(4)
+    history.append(np.array([3]), 1, np.array([0.7]))
+    assert history.trajectory(0)[0].tolist() == [0]
+    assert history.trajectory(3)[0].tolist() == [1]
+    assert len(history.trajectory(2)[0]) == 0
+
+
+def test_only_new_and_changed_customers_are_rescored(predictor, book):
+    state = SnapshotState(predictor.features)
+    first = state.apply(book, predictor, label="jan")
+    assert (first.new, first.changed, len(first.customer_ids)) == (len(book), 0, len(book))
+    np.testing.assert_allclose(first.churn_probs, predictor.predict_records(book.to_dict("records")), rtol=1e-6)
+
+    assert len(state.apply(book, predictor, label="feb").customer_ids) == 0
+
+    changed = book.copy()
+    changed.loc[3, "NPS"] = (changed.loc[3, "NPS"] + 5) % 10
+    delta = state.apply(changed.iloc[:10], predictor, label="mar")  # a partial snapshot
+    assert (delta.new, delta.changed) == (0, 1)
+    assert delta.customer_ids.tolist() == [book.loc[3, "Customer_ID"]]
+    assert len(state) == len(book)
+
+    trajectory = state.trajectory(book.loc[3, "Customer_ID"])
+    assert trajectory["Snapshot"].tolist() == ["jan", "mar"]
+    assert state.trajectory(book.loc[4, "Customer_ID"])["Snapshot"].tolist() == ["jan"]
+
+
+def test_new_model_version_rescores_everyone_once(predictor, book):
+    state = SnapshotState(predictor.features)
+    state.apply(book, predictor, model_version="v1", label="jan")
+    changed = book.copy()
+    changed.loc[0, "NPS"] = (changed.loc[0, "NPS"] + 5) % 10
+    delta = state.apply(changed.iloc[:5], predictor, model_version="v2", label="feb")
+    assert delta.changed == 1
+    for customer_id in book["Customer_ID"].iloc[[0, 1, 15]]:
+        assert state.trajectory(customer_id)["Snapshot"].tolist() == ["jan", "feb"]
+
+
+def test_numeric_ids_match_after_save_and_load(predictor, book, tmp_path):
+    book = book.assign(Customer_ID=np.arange(1000, 1000 + len(book)))
+    state = SnapshotState(predictor.features, history_depth=4)
+    state.apply(book, predictor, model_version="v1")
+    state.save(str(tmp_path / "state.npz"))
+
+    loaded = SnapshotState.load(str(tmp_path / "state.npz"))
+    assert loaded.model_version == "v1" and loaded.history.depth == 4
+    pd.testing.assert_frame_equal(loaded.scores_frame(), state.scores_frame(), check_dtype=False)
+
+    extra = pd.read_csv("data/Churn_full_2.csv", skiprows=range(1, 21), nrows=3).assign(Customer_ID=[1000, 1, 2])
+    delta = loaded.apply(extra, predictor, model_version="v1")
+    assert delta.new == 2
+    assert len(loaded) == len(book) + 2
+    assert len(loaded.trajectory(1000)) == 2
+    with pytest.raises(KeyError):
+        loaded.trajectory("never-seen")
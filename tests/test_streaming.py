@@ -0,0 +1,79 @@
+import pytest
+from openai_resourse import iter_openai_response
+from utils.summary_cache import get_summary_cache, make_key, stream_cached_openai_response
+from utils.summary_generator import generate_customer_summary
+
+MESSAGES = [{"role": "user", "content": "Summarise this customer"}]
+REPLY = "Customer is likely to churn after two late payments"
+PIECES = ["Customer", " is", " likely", " to", " churn", " after", " two", " late", " payments"]
+
+
+def reply(messages):
+    return REPLY
+
+
+def cached(messages):
+    import openai_resourse
+
+    key = make_key(messages, f"{openai_resourse.OPENAI_DEPLOYMENT_NAME}/{openai_resourse.OPENAI_MODEL_NAME}")
+    return get_summary_cache().get(key)
+
+
+def test_iter_yields_chunks_in_order(fake_llm):
+    fake_llm(reply=reply, token_delay=0.01)
+
+    assert list(iter_openai_response(MESSAGES)) == PIECES
+
+
+def test_cached_stream_writes_the_cache_once_complete(fake_llm):
+    server = fake_llm(reply=reply)
+
+    stream = stream_cached_openai_response(MESSAGES)
+    assert next(stream) == PIECES[0]
+    assert cached(MESSAGES) is None  # nothing is cached mid-stream
+    assert [PIECES[0]] + list(stream) == PIECES
+    assert cached(MESSAGES) == REPLY
+
+    # A hit is served whole, without another request
+    assert list(stream_cached_openai_response(MESSAGES)) == [REPLY]
+    assert server.RequestHandlerClass.calls == 1
+
+
+@pytest.mark.parametrize("failure", [{"stream_error_after": 3}, {"stream_drop_after": 3}])
+def test_mid_stream_failure_is_not_cached(fake_llm, failure):
+    fake_llm(reply=reply, **failure)
+
+    pieces = list(stream_cached_openai_response(MESSAGES))
+
+    assert pieces[:3] == PIECES[:3]
+    assert len(pieces) == 4 and pieces[3].startswith("Error:")
+    assert cached(MESSAGES) is None
+
+
+def test_iter_raises_on_a_dropped_stream(fake_llm):
+    fake_llm(reply=reply, stream_drop_after=2)
+
+    with pytest.raises(ConnectionError):
+        list(iter_openai_response(MESSAGES))
+
+
+def test_streamed_summary_matches_the_cached_one(fake_llm):
+    fake_llm(reply=reply)
+
+    streamed = "".join(generate_customer_summary({"NPS": 3}, stream=True))
+
+    assert streamed == REPLY
+    assert generate_customer_summary({"NPS": 3}) == REPLY
+
+
+def test_streamed_claim_summary_fills_severities_when_done(fake_llm):
+    from text_severity_detection import severity_OpenAI_prediction
+
+    fake_llm(reply=reply)
+
+    result = severity_OpenAI_prediction("Rear bumper dented in a parking lot", "No third party", stream=True)
+    assert result["injury_severity"] is None
+
+    assert "".join(result["summary"]) == REPLY
+    assert result["injury_severity"] == REPLY
+    assert result["damage_severity"] is not None
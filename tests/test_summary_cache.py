@@ -0,0 +1,87 @@
+import types
+
+import pytest
+
+from utils import summary_cache
+from utils.summary_cache import SummaryCache, get_cached_openai_response, get_cached_openai_responses, make_key
+
+MESSAGES = [{"role": "user", "content": "Summarise customer 42"}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's wall clock; advance it with `clock.now += seconds`."""
+    fake = types.SimpleNamespace(now=1_000_000.0)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(summary_cache, "time", fake)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SummaryCache(str(tmp_path / "summaries.sqlite"), ttl_seconds=60, max_entries=3)
+
+
+def test_key_ignores_whitespace_and_role_case():
+    same = [{"role": " User", "content": "Summarise   customer\n42 "}]
+    assert make_key(same, "gpt-4o") == make_key(MESSAGES, "gpt-4o")
+    assert make_key(MESSAGES, "gpt-4o-mini") != make_key(MESSAGES, "gpt-4o")
+
+
+def test_round_trip_and_stats(cache):
+    assert cache.get("a") is None
+    cache.set("a", "summary")
+    assert cache.get("a") == "summary"
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_entries_persist_across_instances(cache):
+    cache.set("a", "summary")
+    assert SummaryCache(cache.path).get("a") == "summary"
+
+
+def test_expired_entry_is_a_miss_and_removed(cache, clock):
+    cache.set("a", "summary")
+    clock.now += 60
+    assert cache.get("a") == "summary"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_set_purges_expired_entries(cache, clock):
+    cache.set("old", "summary")
+    clock.now += 61
+    cache.set("new", "summary")
+    assert cache.stats()["entries"] == 1
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    for key in "abc":
+        cache.set(key, key)
+        clock.now += 1
+    assert cache.get("a") == "a"  # a is now the most recently used
+    clock.now += 1
+    cache.set("d", "d")
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["a", "c", "d"]
+    assert cache.stats()["entries"] == 3
+
+
+def test_cached_response_skips_the_llm(fake_llm):
+    server = fake_llm()
+    first = get_cached_openai_response(MESSAGES)
+    assert get_cached_openai_response(MESSAGES) == first
+    assert server.RequestHandlerClass.calls == 1
+
+
+def test_errors_and_invalid_responses_are_not_cached(fake_llm):
+    server = fake_llm(fail_every=1, fail_status=400)
+    assert get_cached_openai_response(MESSAGES).startswith("Error:")
+    assert summary_cache.get_summary_cache().stats()["entries"] == 0
+
+    server = fake_llm()
+    prompts = [MESSAGES, [{"role": "user", "content": "Summarise customer 43"}]]
+    get_cached_openai_responses(prompts, is_valid=lambda response: "42" in response)
+    get_cached_openai_responses(prompts, is_valid=lambda response: "42" in response)
+    assert server.RequestHandlerClass.calls == 3
@@ -1,9 +1,9 @@
-from langchain_openai import AzureChatOpenAI
 import json
 try:
-    from openai_resourse import get_openai_response
+    from openai_resourse import get_openai_response, gather_openai_responses, stream_openai_response, submit_openai_responses
 except ModuleNotFoundError:
-    from src.openai_resourse import get_openai_response
+    from src.openai_resourse import get_openai_response, gather_openai_responses, stream_openai_response, submit_openai_responses
+from utils.severity_classifier import CONFIDENCE_THRESHOLD, predict_severity
  
 
 output_schema = f""" 
@@ -16,7 +16,8 @@ output_schema = f"""
 
 delimiter = "###"
  
-def severity_OpenAI_prediction(DamageDescription, ThirdpartyDescription):
+def severity_messages(DamageDescription, ThirdpartyDescription):
+    """Message lists for the case summary, injury severity and damage severity prompts."""
     system_message_summary = f"""
     You are a helpful claims adjuster who is expert at analyzing the insurance claim description. You will be given below \
     the thirdparty damage description and damage description of the incident. They will be separated by a {delimiter}.
@@ -78,30 +79,86 @@ def severity_OpenAI_prediction(DamageDescription, ThirdpartyDescription):
         {"role": "system", "content": system_message_summary},
         {"role": "user", "content": f"{DamageDescription}{delimiter}{ThirdpartyDescription}"},
     ]
-    summary = get_openai_response(messages_summary)
- 
-    try:
-        messages_category = [
-            {"role": "system", "content": system_message_category},
-            {"role": "user", "content": f"{delimiter}{InjuryDescription}{delimiter}"},
-        ]
-        category = get_openai_response(messages_category)
-    except:
-        category = "fatal"
-       
- 
+
+    messages_category = [
+        {"role": "system", "content": system_message_category},
+        {"role": "user", "content": f"{delimiter}{DamageDescription}{delimiter}{ThirdpartyDescription}{delimiter}"},
+    ]
+
     messages_category2 = [
         {"role": "system", "content": system_message_category2},
-        {"role": "user", "content": f"{CallDescription}"},
+        {"role": "user", "content": f"{DamageDescription}{delimiter}{ThirdpartyDescription}"},
     ]
-    category2 = get_openai_response(messages_category2)
-     
+
+    return messages_summary, messages_category, messages_category2
+
+
+def damage_severity_prediction(DamageDescription, ThirdpartyDescription, confidence_threshold=CONFIDENCE_THRESHOLD):
+    """Damage severity from the local classifier, escalating to the LLM when it is unsure."""
+    severity, confidence = predict_severity(DamageDescription, ThirdpartyDescription)
+    if severity is not None and confidence >= confidence_threshold:
+        return {"damage_severity": severity, "confidence": confidence, "source": "local"}
+
+    messages_category2 = severity_messages(DamageDescription, ThirdpartyDescription)[2]
+    return {"damage_severity": get_openai_response(messages_category2), "confidence": confidence, "source": "llm"}
+
+
+def severity_OpenAI_prediction(DamageDescription, ThirdpartyDescription, confidence_threshold=CONFIDENCE_THRESHOLD, stream=False):
+    """Claim case summary plus injury and damage severity.
+
+    With `stream=True` the "summary" value is a generator of text pieces (for
+    `st.write_stream`) and the severity prompts run in the background while it
+    streams; "injury_severity" and "damage_severity" are None until the
+    summary generator is exhausted, then filled in on the returned dict.
+    """
+    messages_summary, messages_category, messages_category2 = severity_messages(DamageDescription, ThirdpartyDescription)
+
+    # Only pay for the damage severity prompt when the local classifier is unsure
+    severity, confidence = predict_severity(DamageDescription, ThirdpartyDescription)
+    local = severity is not None and confidence >= confidence_threshold
+    if stream:
+        return _stream_severity_prediction(messages_summary, messages_category, None if local else messages_category2, severity)
+
+    if local:
+        summary, category = gather_openai_responses([messages_summary, messages_category])
+        category2, source = severity, "local"
+    else:
+        # The prompts are independent, so they run concurrently
+        summary, category, category2 = gather_openai_responses(
+            [messages_summary, messages_category, messages_category2]
+        )
+        source = "llm"
+
     return {
         "summary": summary,
-        "damage_severity": category2
+        "injury_severity": category,
+        "damage_severity": category2,
+        "damage_severity_source": source
     }
 
 
+def _stream_severity_prediction(messages_summary, messages_category, messages_category2, local_severity):
+    # The classification prompts are started first so they overlap the streamed summary
+    prompts = [messages_category] if messages_category2 is None else [messages_category, messages_category2]
+    categories = submit_openai_responses(prompts)
+    result = {
+        "summary": None,
+        "injury_severity": None,
+        "damage_severity": local_severity if messages_category2 is None else None,
+        "damage_severity_source": "local" if messages_category2 is None else "llm",
+    }
+
+    def summary():
+        yield from stream_openai_response(messages_summary)
+        responses = categories.result()
+        result["injury_severity"] = responses[0]
+        if messages_category2 is not None:
+            result["damage_severity"] = responses[1]
+
+    result["summary"] = summary()
+    return result
+
+
 def details_OpenAI_prediction(CallTranscript):
 
     details_prompt = f"""You are an expert Claims Adjuster and you are given a call transcript. 
@@ -0,0 +1,38 @@
+import argparse
+import joblib
+import numpy as np
+from sklearn.model_selection import cross_val_predict
+from utils.severity_classifier import (
+    CLASSIFIER_PATH, CONFIDENCE_THRESHOLD, load_training_data, train_classifier
+)
+
+# Train the local damage-severity classifier from cached LLM labels.
+#
+# Usage:
+#   python train_severity_classifier.py results.jsonl [more.jsonl ...] --threshold 0.8
+
+parser = argparse.ArgumentParser(description="Train the local damage-severity classifier.")
+parser.add_argument("results", nargs="+", help="JSONL output of claim_batch_severity.py")
+parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+parser.add_argument("--output", default=CLASSIFIER_PATH)
+args = parser.parse_args()
+
+# 📥 Step 1: Load LLM-labelled claims
+texts, labels = load_training_data(args.results)
+classes, counts = np.unique(labels, return_counts=True)
+print(f"Loaded {len(texts)} labelled claims: {dict(zip(classes.tolist(), counts.tolist()))}")
+
+# 📈 Step 2: Estimate how many claims the fast path would answer, and how well
+classifier = train_classifier(texts, labels)
+folds = min(5, counts.min()) if len(counts) else 0
+if folds >= 2:
+    probs = cross_val_predict(train_classifier(texts, labels), texts, labels, cv=folds, method="predict_proba")
+    predicted = classifier.classes_[probs.argmax(axis=1)]
+    confident = probs.max(axis=1) >= args.threshold
+    agreement = (predicted[confident] == np.asarray(labels)[confident]).mean() if confident.any() else float("nan")
+    print(f"Fast-path coverage at threshold {args.threshold}: {confident.mean():.1%}")
+    print(f"Agreement with LLM on covered claims: {agreement:.1%}")
+
+# 💾 Step 3: Save
+joblib.dump(classifier, args.output)
+print(f"✅ Classifier saved to {args.output}")
@@ -0,0 +1,92 @@
+import hashlib
+import os
+import threading
+import pandas as pd
+from utils.instrumentation import span
+
+# Typed columnar cache of the insights dataset.
+# The CSV is parsed once into Parquet (dates, categoricals and narrow dtypes
+# already applied); later process starts read the Parquet file instead.
+
+DATASET_PATH = "data/Churn_full_2.csv"
+CACHE_DIR = os.path.join("data", ".cache")
+
+DATE_COLUMNS = ["Policy_Effective_Date", "Policy_Expiry_Date", "Policy_Cancellation_Date", "Claim_Closed_Date"]
+
+# String columns above this share of distinct values (IDs, policy numbers) stay as strings
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+_frames = {}
+_lock = threading.Lock()
+
+
+def source_version(path):
+    """Fingerprint of the source file; changes whenever the file is modified."""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def cache_path(path, version):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f"{stem}-{version}.parquet")
+
+
+def apply_dtypes(df):
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], dayfirst=True, errors="coerce")
+
+    for col in df.columns:
+        if col in DATE_COLUMNS:
+            continue
+        series = df[col]
+        if pd.api.types.is_integer_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_float_dtype(series):
+            df[col] = pd.to_numeric(series, downcast="float")
+        elif series.nunique() <= CATEGORY_MAX_UNIQUE_RATIO * len(series):
+            df[col] = series.astype("category")
+    return df
+
+
+def build_cache(path, target):
+    df = apply_dtypes(pd.read_csv(path))
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temp file and rename, so concurrent workers never read a partial cache
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, target)
+
+    # Drop caches built from older versions of the same source file
+    prefix = os.path.splitext(os.path.basename(path))[0] + "-"
+    for name in os.listdir(CACHE_DIR):
+        stale = os.path.join(CACHE_DIR, name)
+        if name.startswith(prefix) and name.endswith(".parquet") and stale != target:
+            os.remove(stale)
+    return df
+
+
+def load_dataset(path=DATASET_PATH):
+    """Return the shared, typed frame for `path`.
+
+    One frame is kept per process and source version; callers must treat it
+    as read-only and copy before mutating.
+    """
+    version = source_version(path)
+    with _lock:
+        cached = _frames.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        target = cache_path(path, version)
+        if os.path.exists(target):
+            with span("load_dataset.parquet"):
+                df = pd.read_parquet(target, memory_map=True)
+        else:
+            with span("load_dataset.csv"):
+                df = build_cache(path, target)
+
+        _frames[path] = (version, df)
+        return df
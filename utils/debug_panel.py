@@ -0,0 +1,29 @@
+import os
+import pandas as pd
+import streamlit as st
+from utils.instrumentation import PROFILER, PROFILE_DIR, snapshot
+
+# Sidebar view of the in-process metrics, shown when DEBUG_PANEL=1 or the
+# page is opened with ?debug=1.
+
+DEBUG_PANEL = os.getenv("DEBUG_PANEL", "").lower() in ("1", "true", "yes")
+
+
+def debug_panel_enabled():
+    return DEBUG_PANEL or st.query_params.get("debug", "") in ("1", "true", "yes")
+
+
+def render_debug_panel():
+    if not debug_panel_enabled():
+        return
+    report = snapshot()
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        if report["spans"]:
+            spans = pd.DataFrame.from_dict(report["spans"], orient="index").sort_values("p99_ms", ascending=False)
+            st.dataframe(spans)
+        else:
+            st.caption("No timings recorded yet.")
+        if report["counters"]:
+            st.json(report["counters"])
+        if PROFILER:
+            st.caption(f"{PROFILER} captures are written to {PROFILE_DIR}")
@@ -0,0 +1,29 @@
+import numpy as np
+
+# Churn drivers from XGBoost's native TreeSHAP contributions (pred_contribs).
+# Contributions are in log-odds: positive values push towards churn.
+
+
+def top_drivers(contributions, feature_names, k=3):
+    """Top-k (feature, contribution) for one customer, by absolute contribution."""
+    values = np.asarray(contributions)[:len(feature_names)]  # drop the bias column
+    order = np.argsort(-np.abs(values))[:k]
+    return [(feature_names[j], float(values[j])) for j in order]
+
+
+def scenario_drivers(contributions, feature_names, k=5):
+    """Top-k (feature, mean contribution) across a group, ranked by the size of the net effect."""
+    values = np.asarray(contributions)[:, :len(feature_names)]
+    if len(values) == 0:
+        return []
+    mean = values.mean(axis=0)
+    order = np.argsort(-np.abs(mean))[:k]
+    return [(feature_names[j], float(mean[j])) for j in order]
+
+
+def format_drivers(drivers):
+    lines = []
+    for feature, value in drivers:
+        direction = "raises churn risk" if value > 0 else "lowers churn risk"
+        lines.append(f"- {feature.replace('_', ' ')}: {value:+.2f} log-odds ({direction})")
+    return "\n".join(lines)
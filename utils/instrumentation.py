@@ -0,0 +1,131 @@
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+
+# Process-wide timing spans and counters for the scoring and summary flow.
+#
+#   with span("predict"): ...        rolling p50/p99 per stage
+#   counters.incr("llm.calls")       monotonic counts
+#   snapshot()                       both, for /metrics or the debug panel
+#
+# Set CHURN_PROFILER=cprofile or CHURN_PROFILER=pyinstrument to also capture
+# a profile for each `profiled(...)` block into CHURN_PROFILE_DIR.
+
+METRICS_WINDOW = 10_000
+PROFILER = os.getenv("CHURN_PROFILER", "").strip().lower()
+PROFILE_DIR = os.getenv("CHURN_PROFILE_DIR", os.path.join("data", ".profiles"))
+
+
+class LatencyTracker:
+    """Rolling window of recent latencies per metric name."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            samples = {name: list(values) for name, values in self.samples.items()}
+            counts = dict(self.counts)
+        report = {}
+        for name, values in samples.items():
+            p50, p99 = np.percentile(values, [50, 99]) * 1000
+            report[name] = {"count": counts[name], "p50_ms": round(p50, 3), "p99_ms": round(p99, 3)}
+        return report
+
+
+class Counters:
+    def __init__(self):
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.values[name] = self.values.get(name, 0) + n
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+
+latencies = LatencyTracker()
+counters = Counters()
+
+
+@contextmanager
+def span(name):
+    """Time the block under `name`; recorded even if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        latencies.record(name, time.perf_counter() - start)
+
+
+def record_llm_usage(usage):
+    """Count tokens from a LangChain `usage_metadata` dict or an OpenAI `usage` object."""
+    if usage is None:
+        return
+    if isinstance(usage, dict):
+        prompt, completion = usage.get("input_tokens"), usage.get("output_tokens")
+    else:
+        prompt, completion = getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)
+    if prompt:
+        counters.incr("llm.prompt_tokens", prompt)
+    if completion:
+        counters.incr("llm.completion_tokens", completion)
+
+
+def snapshot():
+    return {"spans": latencies.snapshot(), "counters": counters.snapshot()}
+
+
+# One capture at a time: the interpreter allows a single active profiler
+_profile_lock = threading.Lock()
+_profile_seq = itertools.count()
+
+
+@contextmanager
+def profiled(name):
+    """Profile the block (or decorated function) when CHURN_PROFILER is set; a no-op otherwise."""
+    if PROFILER not in ("cprofile", "pyinstrument") or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_profile_seq)}")
+        if PROFILER == "pyinstrument":
+            from pyinstrument import Profiler
+
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                with open(f"{stem}.html", "w") as f:
+                    f.write(profiler.output_html())
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(f"{stem}.prof")
+        counters.incr("profiles.captured")
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+import joblib
+from utils.data_store import source_version
+from utils.fast_predictor import FastPredictor
+from utils.preprocessing import CategoryEncoder
+
+# Process-wide registry for the churn model and its encoders.
+# Each artifact is loaded once per process and shared by every Streamlit
+# session; a new version is swapped in atomically when the files change.
+#
+# Training publishes each (model, encoders) pair into its own versions/
+# directory and then points models/manifest.json at it, so the registry
+# never sees a model with another version's encoders or a half-written file.
+
+NATIVE_MODEL_PATH = os.path.join("models", "xgb_model.ubj")
+PICKLED_MODEL_PATH = os.path.join("models", "xgb_model.pkl")
+# Prefer the native booster when churn_scoring.py has written one
+MODEL_PATH = os.getenv("CHURN_MODEL_PATH") or (
+    NATIVE_MODEL_PATH if os.path.exists(NATIVE_MODEL_PATH) else PICKLED_MODEL_PATH
+)
+ENCODERS_PATH = os.getenv("CHURN_ENCODERS_PATH", os.path.join("models", "label_encoders.pkl"))
+MANIFEST_PATH = os.getenv("CHURN_MANIFEST_PATH", os.path.join("models", "manifest.json"))
+# An explicit model or encoders path pins the registry to those files
+USE_MANIFEST = not (os.getenv("CHURN_MODEL_PATH") or os.getenv("CHURN_ENCODERS_PATH"))
+VERSIONS_KEPT = int(os.getenv("CHURN_MODEL_VERSIONS_KEPT", 3))
+RELOAD_CHECK_SECONDS = float(os.getenv("CHURN_MODEL_RELOAD_CHECK_SECONDS", 5))
+
+NATIVE_FORMATS = (".json", ".ubj")
+TRAINING_CONFIG_ATTR = "training_config"
+
+LoadedModel = namedtuple(
+    "LoadedModel",
+    ["model", "encoders", "category_encoder", "predictor", "version", "model_path", "encoders_path", "manifest_path"],
+)
+
+_current = None
+_last_check = 0.0
+_lock = threading.Lock()
+
+
+def load_model_file(path):
+    """Load an XGBClassifier from a pickle or from XGBoost's native JSON/UBJ format."""
+    if path.endswith(NATIVE_FORMATS):
+        from xgboost import XGBClassifier
+
+        model = XGBClassifier()
+        model.load_model(path)
+        return model
+    return joblib.load(path)
+
+
+def _atomic_write(path, write):
+    """Call `write(tmp_path)`, then move the finished file into place."""
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.{os.getpid()}.tmp{ext}"  # keep the extension; save_model picks the format from it
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def export_native_model(model, path):
+    """Save `model` in XGBoost's native format (.json or .ubj), written atomically.
+
+    The native format keeps no training hyperparameters, so the booster
+    config is stored with the model as the TRAINING_CONFIG_ATTR attribute.
+    """
+    if not path.endswith(NATIVE_FORMATS):
+        raise ValueError(f"Native model path must end with one of {NATIVE_FORMATS}: {path}")
+    booster = model.get_booster()
+    if booster.attr(TRAINING_CONFIG_ATTR) is None:
+        booster.set_attr(**{TRAINING_CONFIG_ATTR: booster.save_config()})
+    _atomic_write(path, model.save_model)
+
+
+def dump_atomic(obj, path):
+    """`joblib.dump`, written atomically."""
+    _atomic_write(path, lambda tmp_path: joblib.dump(obj, tmp_path))
+
+
+def publish_model(model, encoders, output_dir):
+    """Save a trained (model, encoders) pair as one version and make it current.
+
+    Both artifacts go into versions/<version>/ first; the manifest is
+    replaced last, so readers switch to the new pair in one step. The
+    top-level xgb_model.* and label_encoders.pkl are refreshed afterwards
+    for tools that read them directly. Returns the manifest path.
+    """
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+    version_dir = os.path.join(output_dir, "versions", version)
+    os.makedirs(version_dir, exist_ok=True)
+    export_native_model(model, os.path.join(version_dir, "xgb_model.ubj"))
+    dump_atomic(encoders, os.path.join(version_dir, "label_encoders.pkl"))
+
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    manifest = {
+        "version": version,
+        "model": os.path.join("versions", version, "xgb_model.ubj"),
+        "encoders": os.path.join("versions", version, "label_encoders.pkl"),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    _atomic_write(manifest_path, lambda tmp_path: _write_json(manifest, tmp_path))
+
+    # Model before encoders, so a reader of the loose files never pairs an old model with new codes
+    dump_atomic(model, os.path.join(output_dir, "xgb_model.pkl"))
+    export_native_model(model, os.path.join(output_dir, "xgb_model.ubj"))
+    dump_atomic(encoders, os.path.join(output_dir, "label_encoders.pkl"))
+    _prune_versions(os.path.join(output_dir, "versions"), keep=version)
+    return manifest_path
+
+
+def _write_json(data, path):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def _prune_versions(versions_dir, keep):
+    # Version names sort by time; older ones are kept for a while for readers still loading them
+    old = sorted(name for name in os.listdir(versions_dir) if name != keep)
+    for name in old[:max(0, len(old) - (VERSIONS_KEPT - 1))]:
+        shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+def read_manifest(path=MANIFEST_PATH):
+    """(version, model path, encoders path) from a manifest; paths are relative to its directory."""
+    with open(path) as f:
+        manifest = json.load(f)
+    root = os.path.dirname(path)
+    return manifest["version"], os.path.join(root, manifest["model"]), os.path.join(root, manifest["encoders"])
+
+
+def _version(model_path, encoders_path):
+    return f"{source_version(model_path)}-{source_version(encoders_path)}"
+
+
+def _load(model_path, encoders_path, version=None, manifest_path=None):
+    version = version or _version(model_path, encoders_path)
+    model = load_model_file(model_path)
+    encoders = joblib.load(encoders_path)
+    category_encoder = CategoryEncoder(encoders)
+    predictor = FastPredictor(model, category_encoder)
+    return LoadedModel(model, encoders, category_encoder, predictor, version, model_path, encoders_path, manifest_path)
+
+
+def _load_current():
+    if USE_MANIFEST and os.path.exists(MANIFEST_PATH):
+        version, model_path, encoders_path = read_manifest(MANIFEST_PATH)
+        return _load(model_path, encoders_path, version, MANIFEST_PATH)
+    return _load(MODEL_PATH, ENCODERS_PATH)
+
+
+def get_model_bundle():
+    """Current (model, encoders, category_encoder, predictor, version); reloads if a new version was published."""
+    global _current, _last_check
+    with _lock:
+        now = time.monotonic()
+        if _current is None:
+            _current = _load_current()
+            _last_check = now
+        elif now - _last_check >= RELOAD_CHECK_SECONDS:
+            _last_check = now
+            if _current.manifest_path is not None:
+                version, model_path, encoders_path = read_manifest(_current.manifest_path)
+                if version != _current.version:
+                    _current = _load(model_path, encoders_path, version, _current.manifest_path)
+            # Loose files are only as consistent as whoever writes them
+            elif _version(_current.model_path, _current.encoders_path) != _current.version:
+                _current = _load(_current.model_path, _current.encoders_path)
+        return _current
+
+
+def get_model():
+    return get_model_bundle().model
+
+
+def get_category_encoder():
+    return get_model_bundle().category_encoder
+
+
+def swap_model(model_path, encoders_path=None):
+    """Load a new model version and make it current in one step.
+
+    The new artifacts are fully loaded before the switch, so requests in
+    flight keep using the old (model, encoder) pair and none see a mix.
+    The registry then follows these files rather than the manifest.
+    """
+    global _current, _last_check
+    encoders_path = encoders_path or ENCODERS_PATH
+    loaded = _load(model_path, encoders_path)
+    with _lock:
+        _current = loaded
+        _last_check = time.monotonic()
+    return loaded
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.model_registry models/xgb_model.pkl models/xgb_model.ubj
+    parser = argparse.ArgumentParser(description="Convert a pickled churn model to XGBoost's native format.")
+    parser.add_argument("source", help="Pickled XGBClassifier")
+    parser.add_argument("target", help="Output path ending in .json or .ubj")
+    args = parser.parse_args()
+
+    export_native_model(load_model_file(args.source), args.target)
+    print(f"✅ Native model saved to {args.target}")
@@ -1,12 +1,72 @@
+import numpy as np
+import pandas as pd
+from utils.instrumentation import span
+
+# Features the churn model is trained on, in training column order
+MODEL_FEATURES = [
+    'Address_Change_Flag', 'VIN_Validated', 'Policy_Tenure_Months', 'Coverage_Type',
+    'Deductibles', 'Has_Multi_Policy', 'Loyalty_Program_Enrollment', 'Billing_Method',
+    'Payment_Method', 'Discount_Count', 'Premium_Change_Percent_Last_Renewal',
+    'Late_Payment_Count', 'Auto_Renew_Enabled', 'Claims_Count_Lifetime',
+    'At_Fault_Accident_Count', 'Claim_Satisfaction_Score', 'Interaction_Score', 'NPS',
+    'Complaint_Count', 'Sentiment_Score'
+]
+
+CATEGORICAL_COLUMNS = ['Coverage_Type', 'Billing_Method', 'Payment_Method']
+
+# Code given to categories the encoders never saw; NaN is treated as missing by XGBoost
+UNKNOWN_CATEGORY_CODE = np.nan
+
+
+class CategoryEncoder:
+    """Vectorised lookup-table encoder built from the saved LabelEncoders.
+
+    Produces the same codes as `LabelEncoder.transform`, but maps unseen
+    categories to `unknown_value` instead of raising, so a single bad row
+    cannot fail a whole batch.
+    """
+
+    def __init__(self, encoders, unknown_value=UNKNOWN_CATEGORY_CODE):
+        self.unknown_value = unknown_value
+        self.categories = {
+            col: pd.Index(encoders[col].classes_)
+            for col in CATEGORICAL_COLUMNS if col in encoders
+        }
+
+    def encode_column(self, col, values):
+        categories = self.categories[col]
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Translate the (few) categories once, then gather through the codes
+            lookup = categories.get_indexer(values.cat.categories)
+            codes = values.cat.codes.to_numpy()
+            codes = np.where(codes >= 0, lookup[codes], -1)
+        else:
+            try:
+                codes = categories.get_indexer(values)
+            except TypeError:
+                # Flatten any list to a scalar (e.g., ['Auto-Pay'] ➝ 'Auto-Pay')
+                values = values.map(lambda x: x[0] if isinstance(x, list) else x)
+                codes = categories.get_indexer(values)
+
+        unknown = codes < 0
+        if not unknown.any():
+            return codes
+        if np.isnan(self.unknown_value):
+            codes = codes.astype(float)
+        codes[unknown] = self.unknown_value
+        return codes
+
+    def transform(self, df):
+        with span("encode"):
+            df = df.copy()
+            for col in self.categories:
+                if col in df.columns:
+                    df[col] = self.encode_column(col, df[col])
+            return df
+
+
 def preprocess_input(df, encoders):
-    df = df.copy()
-    
-    for col in ['Coverage_Type', 'Billing_Method', 'Payment_Method']:
-        if col in df.columns:
-            # Flatten any list to a scalar (e.g., ['Auto-Pay'] ➝ 'Auto-Pay')
-            df[col] = df[col].apply(lambda x: x[0] if isinstance(x, list) else x)
-            
-            # Apply the saved LabelEncoder
-            df[col] = encoders[col].transform(df[col])
-    
-    return df
+    if not isinstance(encoders, CategoryEncoder):
+        encoders = CategoryEncoder(encoders)
+    return encoders.transform(df)
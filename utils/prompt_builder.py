@@ -0,0 +1,181 @@
+import hashlib
+import logging
+import os
+import threading
+from functools import lru_cache
+import pandas as pd
+from utils.instrumentation import counters
+from utils.preprocessing import MODEL_FEATURES
+
+# Compact, token-budgeted prompt construction for the summary calls.
+# Prompts carry only model features (churn drivers first), scenario groups
+# are described by aggregate statistics rather than a sample row, and every
+# prompt is trimmed to PROMPT_TOKEN_BUDGET tokens as counted by tiktoken.
+#
+# tiktoken downloads its BPE file on first use; it is cached under
+# TOKENIZER_CACHE_DIR so that happens once per host. Warm the cache at
+# deploy time (or copy the file in) for hosts without outbound access:
+#   python -m utils.prompt_builder --prefetch
+# Without it, token counts fall back to a length estimate, with a warning
+# and the prompt.tokens_estimated counter.
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", 800))
+SCENARIO_PROFILE_FEATURES = int(os.getenv("SCENARIO_PROFILE_FEATURES", 8))
+TOKENIZER_MODEL = os.getenv("AZURE_OPENAI_MODEL_NAME") or "gpt-4o"
+TOKENIZER_CACHE_DIR = os.getenv("TIKTOKEN_CACHE_DIR", os.path.join("data", ".cache", "tiktoken"))
+MESSAGE_OVERHEAD_TOKENS = 4  # chat framing per message
+
+logger = logging.getLogger(__name__)
+
+
+def load_encoding():
+    """tiktoken encoding for TOKENIZER_MODEL, cached in TOKENIZER_CACHE_DIR; raises if unavailable."""
+    os.environ.setdefault("TIKTOKEN_CACHE_DIR", TOKENIZER_CACHE_DIR)  # read by tiktoken on load
+    os.makedirs(os.environ["TIKTOKEN_CACHE_DIR"], exist_ok=True)
+    import tiktoken
+
+    return tiktoken.encoding_for_model(TOKENIZER_MODEL)
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        return load_encoding()
+    except Exception as e:
+        # Not installed, unknown model, or the BPE file is not cached and cannot be fetched
+        logger.warning(
+            "tiktoken encoding for %s unavailable (%s); prompt budgets use a length estimate. "
+            "Run `python -m utils.prompt_builder --prefetch` with network access to cache it in %s",
+            TOKENIZER_MODEL, e, os.environ.get("TIKTOKEN_CACHE_DIR"),
+        )
+        return None
+
+
+def count_tokens(text):
+    encoding = _encoding()
+    if encoding is None:
+        counters.incr("prompt.tokens_estimated")
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def message_tokens(messages):
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def relevant_features(drivers=None, extra=(), limit=None):
+    """Driver features first, then `extra`, then the remaining model features; at most `limit`."""
+    features = list(dict.fromkeys([feature for feature, _ in drivers or []] + list(extra) + MODEL_FEATURES))
+    return features[:limit]
+
+
+def label(feature):
+    return feature.replace("_", " ")
+
+
+def format_value(value):
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return "n/a"
+    if isinstance(value, float):
+        return f"{value:.2f}".rstrip("0").rstrip(".") or "0"
+    return str(value)
+
+
+def describe_column(values, book_values=None):
+    """One-line aggregate of a scenario column, compared with the whole book where useful."""
+    values = values.dropna()
+    if values.empty:
+        return "n/a"
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        text = f"mean {format_value(float(values.mean()))}"
+        if book_values is not None:
+            text += f" (book {format_value(float(book_values.mean()))})"
+        return text
+    shares = values.value_counts(normalize=True).head(3)
+    return ", ".join(f"{category} {share:.0%}" for category, share in shares.items() if share > 0)
+
+
+def scenario_profile(scenario_data, book, features):
+    """{feature: aggregate description} for the scenario rows."""
+    return {
+        feature: describe_column(scenario_data[feature], book[feature])
+        for feature in features
+        if feature in scenario_data.columns
+    }
+
+
+# Profiles are computed once per (index, scenario rows, features)
+_profiles = {}
+_profiles_owner = None
+_profiles_lock = threading.Lock()
+
+
+def get_scenario_profile(scenario_index, positions, features):
+    global _profiles_owner
+    key = (tuple(features), hashlib.sha1(positions.tobytes()).hexdigest())
+    with _profiles_lock:
+        if _profiles_owner is scenario_index and key in _profiles:
+            return _profiles[key]
+
+    profile = scenario_profile(scenario_index.frame.iloc[positions], scenario_index.frame, features)
+    with _profiles_lock:
+        if _profiles_owner is not scenario_index:
+            _profiles_owner = scenario_index
+            _profiles.clear()
+        _profiles[key] = profile
+    return profile
+
+
+def build_messages(name, system, head, lines, tail, budget=PROMPT_TOKEN_BUDGET):
+    """[system, user] messages with as many of `lines` as fit the token budget, in order.
+
+    `head` and `tail` are always kept; the prompt size is logged and counted.
+    """
+    def user_content(body):
+        content = f"{head}\n{body}" if body else head
+        return f"{content}\n\n{tail}" if tail else content
+
+    fixed = message_tokens([
+        {"role": "system", "content": system},
+        {"role": "user", "content": user_content("")},
+    ])
+    kept, used = [], fixed
+    for line in lines:
+        cost = count_tokens(line) + 1  # + newline
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user_content("\n".join(kept))},
+    ]
+    log_prompt(name, messages, dropped=len(lines) - len(kept))
+    return messages
+
+
+def log_prompt(name, messages, dropped=0):
+    tokens = message_tokens(messages)
+    chars = sum(len(message["content"]) for message in messages)
+    counters.incr(f"prompt.{name}.calls")
+    counters.incr(f"prompt.{name}.tokens", tokens)
+    if dropped:
+        counters.incr(f"prompt.{name}.dropped_lines", dropped)
+    logger.info("prompt %s: %d chars, %d tokens, %d lines dropped for budget", name, chars, tokens, dropped)
+    return tokens
+
+
+if __name__ == "__main__":
+    # Usage: python -m utils.prompt_builder --prefetch
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Cache the tiktoken encoding used for prompt budgets.")
+    parser.add_argument("--prefetch", action="store_true", help="Download the encoding into TIKTOKEN_CACHE_DIR")
+    args = parser.parse_args()
+
+    if args.prefetch:
+        encoding = load_encoding()
+        print(f"✅ {encoding.name} for {TOKENIZER_MODEL} cached in {os.environ['TIKTOKEN_CACHE_DIR']}")
@@ -0,0 +1,73 @@
+import hashlib
+import threading
+import streamlit as st
+from utils.instrumentation import span
+
+# Chart aggregates for the Insights scenarios, computed once per
+# (dataset/model version, scenario rows) and drawn with Streamlit's native
+# Vega-Lite charts, so switching scenarios does no plotting work.
+
+MAX_CACHED_CHARTS = 64
+
+_charts = {}
+_owner = None
+_lock = threading.Lock()
+
+
+def aggregate_chart(scenario_data, plot_type, feature):
+    """(title, chart frame indexed by the x axis, x label, y label, kind) for one scenario."""
+    if plot_type == "bar":
+        counts = scenario_data[feature].value_counts(sort=False).sort_index()
+        return f"{feature} Distribution", counts.rename("Customers").to_frame(), feature, "Customers", "bar"
+
+    if plot_type == "late_region":
+        if "State" not in scenario_data.columns:
+            return None
+        totals = scenario_data.groupby("State", observed=True)["Late_Payment_Count"].sum()
+        return "Total Late Payments by State", totals.to_frame(), "State", "Late_Payment_Count", "bar"
+
+    if plot_type == "premium_line":
+        counts = scenario_data["Premium_Change_Percent_Last_Renewal"].round().value_counts().sort_index()
+        return (
+            "Customers by Premium Increase (%)", counts.rename("Customer Count").to_frame(),
+            "Premium Increase (%)", "Customer Count", "line",
+        )
+
+    if plot_type == "claim_outcome":
+        counts = scenario_data["Claim_Outcome"].value_counts().reindex(["Approved", "Declined"], fill_value=0)
+        return "Claim Outcome: Approved vs Declined", counts.rename("Customers").to_frame(), "Claim_Outcome", "Customers", "bar"
+
+    return None
+
+
+def get_scenario_chart(scenario_index, positions, plot_type, feature):
+    """Cached chart aggregate for the rows at `positions` of the indexed dataset."""
+    global _owner
+    key = (plot_type, feature, hashlib.sha1(positions.tobytes()).hexdigest())
+    with _lock:
+        if _owner is scenario_index and key in _charts:
+            return _charts[key]
+
+    with span("chart.aggregate"):
+        chart = aggregate_chart(scenario_index.frame.iloc[positions], plot_type, feature)
+    with _lock:
+        # A new index means a new data/model version; its charts replace the old ones
+        if _owner is not scenario_index:
+            _owner = scenario_index
+            _charts.clear()
+        if len(_charts) >= MAX_CACHED_CHARTS:
+            del _charts[next(iter(_charts))]
+        _charts[key] = chart
+    return chart
+
+
+def render_scenario_chart(chart):
+    if chart is None:
+        return
+    title, data, x_label, y_label, kind = chart
+    with span("chart.render"):
+        st.markdown(f"**{title}**")
+        if kind == "line":
+            st.line_chart(data, x_label=x_label, y_label=y_label)
+        else:
+            st.bar_chart(data, x_label=x_label, y_label=y_label)
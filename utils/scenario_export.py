@@ -0,0 +1,102 @@
+import os
+import tempfile
+import zlib
+import numpy as np
+import pandas as pd
+from utils.instrumentation import counters, span
+
+# Scenario downloads, generated only when a download is requested.
+# Rows are read straight from the ScenarioIndex (cached scores, retention
+# order) and written in fixed-size chunks, so an export never holds more
+# than one chunk of formatted rows alongside the output. The output is
+# spooled to a temporary file once it passes EXPORT_SPOOL_BYTES.
+
+RETENTION_COLUMN = "Retention_Probability (%)"
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", 8 * 1024 * 1024))
+
+# format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_scenario_frames(scenario_index, positions, columns, chunksize=EXPORT_CHUNK_ROWS):
+    """Scenario rows as DataFrame chunks, lowest retention first."""
+    order = scenario_index.lowest_retention(positions, n=len(positions))
+    for start in range(0, len(order), chunksize):
+        rows = order[start:start + chunksize]
+        chunk = {}
+        for col in columns:
+            if col == RETENTION_COLUMN:
+                chunk[col] = (1 - scenario_index.churn_probs[rows]) * 100
+            else:
+                chunk[col] = scenario_index.frame[col].iloc[rows].array
+        yield pd.DataFrame(chunk, columns=columns)
+
+
+def iter_csv_bytes(frames, compress=False):
+    """Encode frames as one CSV stream (header once), optionally gzip-compressed."""
+    compressor = zlib.compressobj(wbits=31) if compress else None  # wbits=31: gzip container
+    header = True
+    for frame in frames:
+        data = frame.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+
+def write_parquet(frames, sink):
+    """Write frames to `sink` as one Parquet file, one row group per chunk."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_scenario(scenario_index, positions, columns, sink, fmt="csv", chunksize=EXPORT_CHUNK_ROWS):
+    """Stream a scenario export in `fmt` (see EXPORT_FORMATS) into the binary file `sink`; returns bytes written."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(EXPORT_FORMATS)}")
+
+    frames = iter_scenario_frames(scenario_index, np.asarray(positions), columns, chunksize)
+    start = sink.tell()
+    with span(f"export.{fmt}"):
+        if fmt == "parquet":
+            write_parquet(frames, sink)
+        else:
+            for data in iter_csv_bytes(frames, compress=fmt == "csv.gz"):
+                sink.write(data)
+    written = sink.tell() - start
+    counters.incr("export.bytes", written)
+    return written
+
+
+def export_scenario(scenario_index, positions, columns, fmt="csv", chunksize=EXPORT_CHUNK_ROWS):
+    """File-like export of a scenario in `fmt`, rewound and ready to read.
+
+    The file is built chunk by chunk in a spooled temporary file, so only
+    small exports stay in memory. `st.download_button` still reads the
+    finished file into Streamlit's in-memory media store to serve it, so
+    one full copy is held while the download is available.
+    """
+    output = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES, prefix="churn_export_")
+    try:
+        write_scenario(scenario_index, positions, columns, output, fmt, chunksize)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
@@ -0,0 +1,84 @@
+import threading
+import numpy as np
+import pandas as pd
+from utils.instrumentation import span
+from utils.preprocessing import MODEL_FEATURES
+
+# Columns the Insights scenarios filter on; each gets a pre-sorted index
+INDEXED_COLUMNS = [
+    "Policy_Expiry_Date", "Claim_Closed_Date",
+    "Late_Payment_Count", "Premium_Change_Percent_Last_Renewal",
+]
+
+_current = None
+_lock = threading.Lock()
+
+
+class ScenarioIndex:
+    """Churn scores and sorted column indexes for one dataset/model version.
+
+    The whole dataset is scored once; scenario filters become binary
+    searches over the sorted indexes instead of full-table boolean masks.
+    """
+
+    def __init__(self, df, model, category_encoder, predictor=None):
+        self.frame = df
+        self.model = model
+        self.predictor = predictor
+        self._contributions = None
+        self._contributions_lock = threading.Lock()
+
+        features = category_encoder.transform(df[MODEL_FEATURES])
+        self.churn_probs = model.predict_proba(features)[:, 1]
+        self.scored = df.assign(Churn_Probability=self.churn_probs)
+
+        # Highest churn (lowest retention) first
+        self.retention_order = np.argsort(-self.churn_probs, kind="stable")
+
+        self.sorted = {}
+        for col in INDEXED_COLUMNS:
+            if col not in df.columns:
+                continue
+            values = df[col].to_numpy()
+            valid = np.flatnonzero(df[col].notna().to_numpy())
+            order = valid[np.argsort(values[valid], kind="stable")]
+            self.sorted[col] = (order, values[order])
+
+    def range(self, col, lower=None, upper=None, include_lower=True, include_upper=True):
+        """Row positions (ascending) where `lower <(=) col <(=) upper`; NaN/NaT never match."""
+        order, values = self.sorted[col]
+        start, stop = 0, len(values)
+        if lower is not None:
+            start = np.searchsorted(values, _as_key(lower, values.dtype), side="left" if include_lower else "right")
+        if upper is not None:
+            stop = np.searchsorted(values, _as_key(upper, values.dtype), side="right" if include_upper else "left")
+        return np.sort(order[start:max(start, stop)])
+
+    def contributions(self, positions):
+        """TreeSHAP contributions for `positions`; the whole dataset is explained once, on first use."""
+        with self._contributions_lock:
+            if self._contributions is None:
+                self._contributions = self.predictor.contributions(self.frame[MODEL_FEATURES])
+        return self._contributions[positions]
+
+    def lowest_retention(self, positions, n=5):
+        """The `n` rows among `positions` with the highest churn probability."""
+        member = np.zeros(len(self.churn_probs), dtype=bool)
+        member[positions] = True
+        return self.retention_order[member[self.retention_order]][:n]
+
+
+def _as_key(value, dtype):
+    if np.issubdtype(dtype, np.datetime64):
+        return pd.Timestamp(value).to_datetime64().astype(dtype)
+    return value
+
+
+def get_scenario_index(df, model, category_encoder, predictor=None):
+    """Return the shared index, rebuilding it only when the frame or model changes."""
+    global _current
+    with _lock:
+        if _current is None or _current.frame is not df or _current.model is not model:
+            with span("scenario_index.build"):
+                _current = ScenarioIndex(df, model, category_encoder, predictor)
+        return _current
@@ -0,0 +1,201 @@
+import os
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+
+# Declarative retention scenarios for the Insights tab.
+# A scenario is a list of column conditions plus how to present it; the
+# conditions are compiled to NumPy masks and every scenario is evaluated in
+# one pass per (dataset/model version, day), so clicks are dict lookups.
+#
+# More scenarios can be loaded from YAML (SCENARIOS_PATH), e.g.
+#
+#   - key: high_complaints
+#     label: "😠 Frequent Complainers"
+#     title: "Customers with 3+ Complaints"
+#     feature: Complaint_Count
+#     chart: bar
+#     conditions:
+#       - {column: Complaint_Count, lower: 3}
+#
+# Date bounds may be relative to today: "today", "today+90d", "today-90d".
+
+SCENARIOS_PATH = os.getenv("SCENARIOS_PATH")
+
+DEFAULT_EXPORT_COLUMNS = ("Customer_ID", "{feature}", "Policy_Number", "Policy_Expiry_Date", "State")
+
+_RELATIVE_DATE = re.compile(r"^today(?:\s*([+-])\s*(\d+)\s*d)?$")
+
+
+@dataclass(frozen=True)
+class Condition:
+    """`lower <(=) column <(=) upper`, or `column in values`; missing values never match."""
+
+    column: str
+    lower: object = None
+    upper: object = None
+    include_lower: bool = True
+    include_upper: bool = True
+    values: tuple = None
+
+
+@dataclass(frozen=True)
+class Scenario:
+    key: str
+    label: str
+    title: str
+    feature: str
+    chart: str
+    conditions: tuple
+    export_columns: tuple = DEFAULT_EXPORT_COLUMNS
+    filename_prefix: str = None
+
+    @property
+    def columns(self):
+        """Export columns with `{feature}` filled in."""
+        return [col.format(feature=self.feature) for col in self.export_columns]
+
+    @property
+    def file_prefix(self):
+        return self.filename_prefix or self.key
+
+
+SCENARIOS = (
+    Scenario(
+        key="policy",
+        label="📅 Policy Expiring in 90 Days",
+        title="Customers with Policies Expiring in Next 90 Days",
+        feature="Coverage_Type",
+        chart="bar",
+        conditions=(Condition("Policy_Expiry_Date", "today", "today+90d", include_lower=False),),
+        filename_prefix="policy_expiring",
+    ),
+    Scenario(
+        key="late",
+        label="💳 Late Payment Insights",
+        title="Customers with Late Payments",
+        feature="Late_Payment_Count",
+        chart="late_region",
+        conditions=(Condition("Late_Payment_Count", lower=0, include_lower=False),),
+        filename_prefix="late_payments",
+    ),
+    Scenario(
+        key="premium",
+        label="📈 Premium Increase by five percent",
+        title="Customers with Premium Increase > 5%",
+        feature="Premium_Change_Percent_Last_Renewal",
+        chart="premium_line",
+        conditions=(Condition("Premium_Change_Percent_Last_Renewal", lower=5, include_lower=False),),
+        filename_prefix="premium_increase",
+    ),
+    Scenario(
+        key="claims",
+        label="📂 Claims Closed in 90 Days",
+        title="Customers with Claims Closed in Last 90 Days",
+        feature="Claim_Outcome",
+        chart="claim_outcome",
+        # Closed after the start of day -90 and up to today, the baseline's window
+        conditions=(Condition("Claim_Closed_Date", "today-90d", "today", include_lower=False),),
+        filename_prefix="claims_closed",
+    ),
+)
+
+
+def load_scenarios(path):
+    """Scenarios from a YAML list (see the module comment for the schema)."""
+    import yaml
+
+    with open(path) as f:
+        entries = yaml.safe_load(f) or []
+    scenarios = []
+    for entry in entries:
+        conditions = tuple(
+            Condition(**{**c, "values": tuple(c["values"])} if "values" in c else c)
+            for c in entry.pop("conditions")
+        )
+        if "export_columns" in entry:
+            entry["export_columns"] = tuple(entry["export_columns"])
+        scenarios.append(Scenario(conditions=conditions, **entry))
+    return tuple(scenarios)
+
+
+@lru_cache(maxsize=1)
+def get_scenarios():
+    """Built-in scenarios followed by any loaded from SCENARIOS_PATH (read once per process)."""
+    if not SCENARIOS_PATH:
+        return SCENARIOS
+    return SCENARIOS + load_scenarios(SCENARIOS_PATH)
+
+
+def resolve_bound(value, today):
+    if isinstance(value, str):
+        match = _RELATIVE_DATE.match(value.strip())
+        if match:
+            sign, days = match.groups()
+            offset = pd.Timedelta(days=int(days)) if days else pd.Timedelta(0)
+            return today - offset if sign == "-" else today + offset
+        return pd.Timestamp(value)
+    return value
+
+
+def _condition_mask(scenario_index, condition, today, columns):
+    n_rows = len(scenario_index.churn_probs)
+    if condition.values is not None:
+        return scenario_index.frame[condition.column].isin(condition.values).to_numpy()
+
+    lower = resolve_bound(condition.lower, today)
+    upper = resolve_bound(condition.upper, today)
+    if condition.column in scenario_index.sorted:
+        # Binary search on the pre-sorted column, scattered into a mask
+        mask = np.zeros(n_rows, dtype=bool)
+        mask[scenario_index.range(condition.column, lower, upper, condition.include_lower, condition.include_upper)] = True
+        return mask
+
+    if condition.column not in columns:
+        columns[condition.column] = scenario_index.frame[condition.column].to_numpy()
+    values = columns[condition.column]
+    if np.issubdtype(values.dtype, np.datetime64):
+        lower = None if lower is None else pd.Timestamp(lower).to_datetime64()
+        upper = None if upper is None else pd.Timestamp(upper).to_datetime64()
+    mask = np.ones(n_rows, dtype=bool)
+    if lower is not None:
+        mask &= values >= lower if condition.include_lower else values > lower
+    if upper is not None:
+        mask &= values <= upper if condition.include_upper else values < upper
+    return mask
+
+
+def evaluate_scenarios(scenario_index, scenarios, today):
+    """Row positions (ascending) for every scenario, sharing column arrays and repeated conditions."""
+    columns, masks, positions = {}, {}, {}
+    for scenario in scenarios:
+        mask = np.ones(len(scenario_index.churn_probs), dtype=bool)
+        for condition in scenario.conditions:
+            if condition not in masks:
+                masks[condition] = _condition_mask(scenario_index, condition, today, columns)
+            mask &= masks[condition]
+        positions[scenario.key] = np.flatnonzero(mask)
+    return positions
+
+
+_evaluated = None  # (scenario_index, today, scenarios, positions)
+_lock = threading.Lock()
+
+
+def get_scenario_positions(scenario_index, scenarios=None, today=None):
+    """Cached positions for all scenarios; recomputed when the index, the day or the scenario set changes."""
+    global _evaluated
+    scenarios = scenarios if scenarios is not None else get_scenarios()
+    today = today if today is not None else pd.Timestamp.today().normalize()
+    with _lock:
+        cached = _evaluated
+    if cached is not None and cached[0] is scenario_index and cached[1] == today and cached[2] == scenarios:
+        return cached[3]
+
+    positions = evaluate_scenarios(scenario_index, scenarios, today)
+    with _lock:
+        _evaluated = (scenario_index, today, scenarios, positions)
+    return positions
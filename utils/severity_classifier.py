@@ -0,0 +1,85 @@
+import json
+import os
+import threading
+import joblib
+
+# Local damage-severity classifier (TF-IDF + logistic regression) trained on
+# labels previously produced by the LLM. Confident predictions skip the LLM
+# round trip; everything else is escalated.
+
+# The damage prompt's five grades plus its two non-grade answers; the
+# classifier learns all seven so a confident prediction can also be "No Damage"
+SEVERITY_CLASSES = ["Total Loss", "Severe", "Major", "Moderate", "Minor", "No Damage", "Irrelevant"]
+CLASSIFIER_PATH = os.getenv("SEVERITY_CLASSIFIER_PATH", os.path.join("models", "severity_classifier.pkl"))
+CONFIDENCE_THRESHOLD = float(os.getenv("SEVERITY_CONFIDENCE_THRESHOLD", 0.8))
+
+_classifier = None
+_loaded = False
+_lock = threading.Lock()
+
+
+def claim_text(damage, thirdparty):
+    return f"{damage} ### {thirdparty}"
+
+
+def normalise_label(label):
+    """Map raw LLM output ("**Minor.**", "total loss", "irrelevant") to a severity class, or None."""
+    cleaned = "".join(ch for ch in str(label) if ch.isalpha() or ch == " ").strip().lower()
+    for severity in SEVERITY_CLASSES:
+        if cleaned == severity.lower():
+            return severity
+    return None
+
+
+def load_training_data(paths):
+    """Texts and labels from claim_batch_severity.py JSONL results."""
+    texts, labels = [], []
+    seen = set()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                label = normalise_label(row.get("damage_severity", ""))
+                if label is None or row.get("key") in seen or "DamageDescription" not in row:
+                    continue
+                seen.add(row.get("key"))
+                texts.append(claim_text(row["DamageDescription"], row.get("ThirdpartyDescription", "")))
+                labels.append(label)
+    return texts, labels
+
+
+def train_classifier(texts, labels):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    classifier = make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, lowercase=True),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+    classifier.fit(texts, labels)
+    return classifier
+
+
+def get_severity_classifier():
+    """The saved classifier, or None when none has been trained yet."""
+    global _classifier, _loaded
+    with _lock:
+        if not _loaded:
+            _classifier = joblib.load(CLASSIFIER_PATH) if os.path.exists(CLASSIFIER_PATH) else None
+            _loaded = True
+        return _classifier
+
+
+def predict_severity(damage, thirdparty, classifier=None):
+    """Return (label, confidence); (None, 0.0) when no classifier is available."""
+    if classifier is None:
+        classifier = get_severity_classifier()
+    if classifier is None:
+        return None, 0.0
+    probs = classifier.predict_proba([claim_text(damage, thirdparty)])[0]
+    best = probs.argmax()
+    return str(classifier.classes_[best]), float(probs[best])
@@ -0,0 +1,196 @@
+import os
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from utils.instrumentation import counters, span
+
+# Per-customer churn state carried across snapshot files shaped like
+# data/Churn_time.csv. Each snapshot is diffed against the stored encoded
+# features; only new or changed customers are rescored, and each rescore is
+# appended to a fixed-depth ring buffer of score history per customer.
+# Customers missing from a snapshot keep their last state, so a snapshot may
+# hold the whole book or only the rows that changed.
+
+STATE_PATH = os.getenv("CHURN_SNAPSHOT_STATE_PATH", os.path.join("data", ".state", "churn_snapshot.npz"))
+HISTORY_DEPTH = int(os.getenv("CHURN_SNAPSHOT_HISTORY_DEPTH", 12))
+
+SnapshotDelta = namedtuple("SnapshotDelta", ["snapshot", "rows", "new", "changed", "customer_ids", "churn_probs"])
+
+
+def _same_rows(a, b):
+    """Row-wise equality of two float matrices, treating NaN == NaN."""
+    return ((a == b) | (np.isnan(a) & np.isnan(b))).all(axis=1)
+
+
+def _grown(array, capacity, fill):
+    grown = np.full((capacity,) + array.shape[1:], fill, dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class ScoreHistory:
+    """Last `depth` (snapshot, churn probability) pairs per customer, in two 2-D ring-buffer arrays."""
+
+    def __init__(self, capacity=0, depth=HISTORY_DEPTH):
+        self.depth = depth
+        self.snapshots = np.full((capacity, depth), -1, dtype=np.int32)
+        self.scores = np.full((capacity, depth), np.nan, dtype=np.float32)
+        self.appended = np.zeros(capacity, dtype=np.int64)  # next slot is appended % depth
+
+    def reserve(self, capacity):
+        if capacity > len(self.appended):
+            self.snapshots = _grown(self.snapshots, capacity, -1)
+            self.scores = _grown(self.scores, capacity, np.nan)
+            self.appended = _grown(self.appended, capacity, 0)
+
+    def append(self, rows, snapshot, scores):
+        """Record `scores` for the (unique) customer `rows` at `snapshot`."""
+        slots = self.appended[rows] % self.depth
+        self.snapshots[rows, slots] = snapshot
+        self.scores[rows, slots] = scores
+        self.appended[rows] += 1
+
+    def trajectory(self, row):
+        """(snapshots, scores) for one customer, oldest first."""
+        total = int(self.appended[row])
+        slots = np.arange(max(0, total - self.depth), total) % self.depth
+        return self.snapshots[row, slots], self.scores[row, slots]
+
+
+class SnapshotState:
+    """Encoded features, current score and score history for every customer seen so far."""
+
+    def __init__(self, feature_names, history_depth=HISTORY_DEPTH):
+        self.feature_names = list(feature_names)
+        self.model_version = None
+        self.snapshot_labels = []
+        self.customer_ids = pd.Index([], dtype=object)
+        # Arrays are over-allocated; rows past len(customer_ids) are unused
+        self.features = np.empty((0, len(self.feature_names)), dtype=np.float32)
+        self.churn_probs = np.empty(0, dtype=np.float32)
+        self.history = ScoreHistory(0, history_depth)
+
+    def __len__(self):
+        return len(self.customer_ids)
+
+    def _add_customers(self, ids):
+        start = len(self.customer_ids)
+        size = start + len(ids)
+        if size > len(self.churn_probs):
+            capacity = max(size, 2 * len(self.churn_probs), 1024)
+            self.features = _grown(self.features, capacity, np.nan)
+            self.churn_probs = _grown(self.churn_probs, capacity, np.nan)
+            self.history.reserve(capacity)
+        self.customer_ids = self.customer_ids.append(pd.Index(ids, dtype=object))
+        return np.arange(start, size)
+
+    def _score(self, rows, features, predictor, snapshot):
+        churn_probs = predictor.predict_encoded(features)
+        self.features[rows] = features
+        self.churn_probs[rows] = churn_probs
+        self.history.append(rows, snapshot, churn_probs)
+        counters.incr("snapshot.rescored", len(rows))
+        return churn_probs
+
+    def apply(self, df, predictor, model_version=None, label=None):
+        """Apply one snapshot (a frame with Customer_ID and the model features) and rescore what changed.
+
+        When `model_version` differs from the version the stored scores came
+        from, every known customer is rescored first.
+        """
+        if list(predictor.features) != self.feature_names:
+            raise ValueError("Predictor features do not match the snapshot state")
+
+        with span("snapshot.apply"):
+            snapshot = len(self.snapshot_labels)
+            self.snapshot_labels.append(label or f"snapshot-{snapshot}")
+
+            # IDs are stored as strings; a CSV read may infer them as numbers
+            df = df.assign(Customer_ID=df["Customer_ID"].astype(str)).drop_duplicates("Customer_ID", keep="last")
+            ids = df["Customer_ID"].to_numpy(dtype=object)
+            incoming = predictor.encode(df)
+
+            known = len(self)
+            rows = self.customer_ids.get_indexer(ids)
+            new = rows < 0
+            changed = np.zeros(len(df), dtype=bool)
+            changed[~new] = ~_same_rows(self.features[rows[~new]], incoming[~new])
+            if new.any():
+                rows[new] = self._add_customers(ids[new])
+            rescore = new | changed
+
+            if model_version is not None and model_version != self.model_version:
+                if known and self.model_version is not None:
+                    # Rescore the rest of the book under the new model; rows rescored
+                    # below are left out, so each customer gets one entry per snapshot
+                    stale = np.ones(known, dtype=bool)
+                    stale[rows[changed]] = False
+                    stale = np.flatnonzero(stale)
+                    self._score(stale, self.features[stale], predictor, snapshot)
+                self.model_version = model_version
+
+            churn_probs = np.empty(0, dtype=np.float32)
+            if rescore.any():
+                churn_probs = self._score(rows[rescore], incoming[rescore], predictor, snapshot)
+
+        return SnapshotDelta(
+            snapshot=self.snapshot_labels[snapshot],
+            rows=len(df),
+            new=int(new.sum()),
+            changed=int(changed.sum()),
+            customer_ids=ids[rescore],
+            churn_probs=churn_probs,
+        )
+
+    def scores_frame(self):
+        """Current churn probability per customer."""
+        return pd.DataFrame({
+            "Customer_ID": self.customer_ids,
+            "Churn_Probability": self.churn_probs[:len(self)],
+        })
+
+    def trajectory(self, customer_id):
+        """Score history for one customer as a frame of (Snapshot, Churn_Probability), oldest first.
+
+        Raises KeyError for a customer the state has never seen.
+        """
+        row = self.customer_ids.get_loc(str(customer_id))
+        snapshots, scores = self.history.trajectory(row)
+        return pd.DataFrame({
+            "Snapshot": [self.snapshot_labels[s] for s in snapshots],
+            "Churn_Probability": scores,
+        })
+
+    def save(self, path=STATE_PATH):
+        """Write the state to one .npz file, atomically."""
+        size = len(self)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                feature_names=np.asarray(self.feature_names, dtype=str),
+                model_version=np.asarray(self.model_version or "", dtype=str),
+                snapshot_labels=np.asarray(self.snapshot_labels, dtype=str),
+                customer_ids=np.asarray(self.customer_ids, dtype=str),
+                features=self.features[:size],
+                churn_probs=self.churn_probs[:size],
+                history_snapshots=self.history.snapshots[:size],
+                history_scores=self.history.scores[:size],
+                history_appended=self.history.appended[:size],
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=STATE_PATH):
+        with np.load(path) as data:
+            state = cls(data["feature_names"].tolist(), history_depth=data["history_scores"].shape[1])
+            state.model_version = str(data["model_version"]) or None
+            state.snapshot_labels = data["snapshot_labels"].tolist()
+            state.customer_ids = pd.Index(data["customer_ids"].tolist(), dtype=object)
+            state.features = data["features"]
+            state.churn_probs = data["churn_probs"]
+            state.history.snapshots = data["history_snapshots"]
+            state.history.scores = data["history_scores"]
+            state.history.appended = data["history_appended"]
+        return state
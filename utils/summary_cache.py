@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from utils.instrumentation import counters
+
+# Persistent LLM response cache shared by every worker on the host.
+# Entries are keyed on a normalised hash of the message list plus the
+# deployment/model name, expire after a TTL and are evicted LRU-first.
+
+CACHE_PATH = os.getenv("SUMMARY_CACHE_PATH", os.path.join("data", ".cache", "summaries.sqlite"))
+DEFAULT_TTL_SECONDS = int(os.getenv("SUMMARY_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+DEFAULT_MAX_ENTRIES = int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 10_000))
+
+
+def make_key(messages, model_name):
+    normalised = [
+        {
+            "role": str(message["role"]).strip().lower(),
+            "content": re.sub(r"\s+", " ", str(message["content"])).strip(),
+        }
+        for message in messages
+    ]
+    payload = json.dumps({"model": model_name, "messages": normalised}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SummaryCache:
+    def __init__(self, path=CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        # WAL lets several Streamlit workers read while one writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+            "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed ON summaries (accessed_at)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,))
+            self._conn.execute(
+                "DELETE FROM summaries WHERE key IN ("
+                "SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM summaries")
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "entries": entries,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_summary_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SummaryCache()
+        return _cache
+
+
+def get_cached_openai_response(messages):
+    """`get_openai_response`, served from the shared cache when the same prompt was seen before."""
+    from openai_resourse import OPENAI_DEPLOYMENT_NAME, OPENAI_MODEL_NAME, get_openai_response
+
+    cache = get_summary_cache()
+    key = make_key(messages, f"{OPENAI_DEPLOYMENT_NAME}/{OPENAI_MODEL_NAME}")
+    response = cache.get(key)
+    if response is not None:
+        counters.incr("summary_cache.hits")
+        return response
+
+    counters.incr("summary_cache.misses")
+    response = get_openai_response(messages)
+    # Failures come back as "Error: ..." strings; never cache them
+    if not response.startswith("Error:"):
+        cache.set(key, response)
+    return response
+
+
+def get_cached_openai_responses(messages_list, is_valid=None):
+    """Batched `get_cached_openai_response`: cache misses are sent concurrently.
+
+    Responses are cached only if they are not errors and pass `is_valid`.
+    """
+    from openai_resourse import OPENAI_DEPLOYMENT_NAME, OPENAI_MODEL_NAME, gather_openai_responses
+
+    cache = get_summary_cache()
+    keys = [make_key(messages, f"{OPENAI_DEPLOYMENT_NAME}/{OPENAI_MODEL_NAME}") for messages in messages_list]
+    responses = [cache.get(key) for key in keys]
+    missing = [i for i, response in enumerate(responses) if response is None]
+    counters.incr("summary_cache.hits", len(keys) - len(missing))
+    counters.incr("summary_cache.misses", len(missing))
+
+    if missing:
+        fetched = gather_openai_responses([messages_list[i] for i in missing])
+        for i, response in zip(missing, fetched):
+            responses[i] = response
+            if not response.startswith("Error:") and (is_valid is None or is_valid(response)):
+                cache.set(keys[i], response)
+    return responses
+
+
+def stream_cached_openai_response(messages):
+    """Streaming `get_cached_openai_response`: a cached response is yielded whole.
+
+    On a miss the response is yielded as it arrives and cached once complete;
+    a failed or abandoned stream is not cached.
+    """
+    from openai_resourse import OPENAI_DEPLOYMENT_NAME, OPENAI_MODEL_NAME, iter_openai_response
+
+    cache = get_summary_cache()
+    key = make_key(messages, f"{OPENAI_DEPLOYMENT_NAME}/{OPENAI_MODEL_NAME}")
+    response = cache.get(key)
+    if response is not None:
+        counters.incr("summary_cache.hits")
+        yield response
+        return
+
+    counters.incr("summary_cache.misses")
+    pieces = []
+    try:
+        for piece in iter_openai_response(messages):
+            pieces.append(piece)
+            yield piece
+    except Exception as e:
+        yield f"Error: {str(e)}"
+        return
+    cache.set(key, "".join(pieces))
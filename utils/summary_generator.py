@@ -1,54 +1,203 @@
-from openai_resourse import get_openai_response
+import json
+import os
+import numpy as np
+from utils.explanations import format_drivers
+from utils.prompt_builder import build_messages, count_tokens, format_value, label, log_prompt, message_tokens, relevant_features
+from utils.summary_cache import get_cached_openai_response, get_cached_openai_responses, stream_cached_openai_response
+
+
+CUSTOMER_SYSTEM_PROMPT = (
+    "You are an expert insurance analyst. Summarize the customer's insurance profile, "
+    "highlighting any key risk factors or indicators of churn. Be concise and professional."
+)
+
+SCENARIO_SYSTEM_PROMPT = (
+    "You are a senior data analyst specializing in customer churn for insurance companies. "
+    "Provide an insightful summary of the scenario below. Focus on trends, business impact, and potential strategies."
+)
+
+
+def _driver_lines(drivers):
+    # Ground the narrative in what the model actually weighed; drivers go first so budget trimming keeps them
+    if not drivers:
+        return []
+    return ["Model-identified churn drivers (SHAP contributions):"] + format_drivers(drivers).split("\n")
+
 
 # Main Customer Summary
-def generate_customer_summary(customer_data: dict) -> str:
-    details = "\n".join([f"{k.replace('_', ' ')}: {v}" for k, v in customer_data.items()])
-    
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are an expert insurance analyst. Summarize the customer's insurance profile, "
-                "highlighting any key risk factors or indicators of churn. Be concise and professional."
-            )
-        },
-        {
-            "role": "user",
-            "content": (
-                f"Given the following customer details, write a short 3–4 line summary:\n\n{details}"
-            )
-        }
-    ]
-    
-    return get_openai_response(messages)
+def generate_customer_summary(customer_data: dict, drivers=None, stream=False):
+    """Short customer summary; with `stream=True`, a generator of text pieces for `st.write_stream`."""
+    features = [f for f in relevant_features(drivers) if f in customer_data]
+    details = [f"{label(f)}: {format_value(customer_data[f])}" for f in features]
+
+    messages = build_messages(
+        "customer",
+        CUSTOMER_SYSTEM_PROMPT,
+        "Given the following customer details, write a short 3–4 line summary:",
+        _driver_lines(drivers) + ["Customer details:"] + details,
+        "",
+    )
+    if stream:
+        return stream_cached_openai_response(messages)
+    return get_cached_openai_response(messages)
 
 
 # Enhanced Scenario-based AI Summary
-def generate_customer_summary_tab2(sample_data: dict, scenario_title: str, stats: dict) -> str:
-    details = "\n".join([f"{k.replace('_', ' ')}: {v}" for k, v in sample_data.items()])
+def generate_customer_summary_tab2(profile: dict, scenario_title: str, stats: dict, drivers=None, stream=False):
+    """Scenario summary from aggregate statistics; `profile` maps feature -> description (see prompt_builder).
+
+    With `stream=True`, returns a generator of text pieces for `st.write_stream`.
+    """
     count = stats.get("count")
     percent = stats.get("percentage")
     retention = stats.get("avg_retention")
 
-    messages = [
-        {
-            "role": "system",
-            "content": (
-                "You are a senior data analyst specializing in customer churn for insurance companies. "
-                "Provide an insightful summary of the scenario below. Focus on trends, business impact, and potential strategies."
-            )
-        },
+    messages = build_messages(
+        "scenario",
+        SCENARIO_SYSTEM_PROMPT,
+        (
+            f"Scenario: {scenario_title}\n\n"
+            f"There are {count} customers falling under this scenario, accounting for {percent}% of the overall data. "
+            f"The average predicted retention probability is {retention}%.\n"
+        ),
+        _driver_lines(drivers) + ["Group profile:"] + [f"- {label(f)}: {text}" for f, text in profile.items()],
+        (
+            "Based on this, write a short summary paragraph highlighting the customer behavior, possible churn risks, "
+            "and what strategic insights the business can gain from this group."
+        ),
+    )
+    if stream:
+        return stream_cached_openai_response(messages)
+    return get_cached_openai_response(messages)
+
+
+# --- Batched summaries ---
+# Many customers per request: one shared instruction, a field legend sent
+# once, one compact line per customer, and a JSON array back keyed by
+# Customer_ID. Batches are split to stay under a prompt token budget.
+
+SUMMARY_BATCH_MAX_TOKENS = int(os.getenv("SUMMARY_BATCH_MAX_TOKENS", 6000))
+SUMMARY_BATCH_MAX_CUSTOMERS = int(os.getenv("SUMMARY_BATCH_MAX_CUSTOMERS", 40))
+
+FIELD_ALIASES = {
+    "Address_Change_Flag": "addr_chg",
+    "VIN_Validated": "vin_ok",
+    "Policy_Tenure_Months": "tenure_m",
+    "Coverage_Type": "coverage",
+    "Deductibles": "deduct",
+    "Has_Multi_Policy": "multi_pol",
+    "Loyalty_Program_Enrollment": "loyalty",
+    "Billing_Method": "billing",
+    "Payment_Method": "payment",
+    "Discount_Count": "discounts",
+    "Premium_Change_Percent_Last_Renewal": "prem_chg_pct",
+    "Late_Payment_Count": "late_pay",
+    "Auto_Renew_Enabled": "auto_renew",
+    "Claims_Count_Lifetime": "claims",
+    "At_Fault_Accident_Count": "at_fault",
+    "Claim_Satisfaction_Score": "claim_sat",
+    "Interaction_Score": "interaction",
+    "NPS": "nps",
+    "Complaint_Count": "complaints",
+    "Sentiment_Score": "sentiment",
+}
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an expert insurance analyst. For each customer, write a 2–3 sentence retention note "
+    "highlighting key risk factors or indicators of churn. Be concise and professional. "
+    'Reply with only a JSON array of objects: [{"Customer_ID": "...", "summary": "..."}], one per customer.'
+)
+
+
+def _compact_value(value):
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if value is None or (isinstance(value, (float, np.floating)) and np.isnan(value)):
+        return ""
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.2f}".rstrip("0").rstrip(".")
+    return str(value).replace("|", "/")
+
+
+def _customer_line(customer_id, customer, fields):
+    return "|".join([str(customer_id)] + [_compact_value(customer.get(field)) for field in fields])
+
+
+def _batch_messages(fields, lines):
+    legend = "|".join(["Customer_ID"] + [FIELD_ALIASES.get(field, field) for field in fields])
+    aliases = ", ".join(f"{FIELD_ALIASES[f]}={f}" for f in fields if f in FIELD_ALIASES)
+    return [
+        {"role": "system", "content": BATCH_SYSTEM_PROMPT},
         {
             "role": "user",
-            "content": (
-                f"Scenario: {scenario_title}\n\n"
-                f"There are {count} customers falling under this scenario, accounting for {percent}% of the overall data. "
-                f"The average predicted retention probability is {retention}%.\n\n"
-                f"A sample customer from this group is:\n{details}\n\n"
-                f"Based on this, write a short summary paragraph highlighting the customer behavior, possible churn risks, "
-                f"and what strategic insights the business can gain from this group."
-            )
-        }
+            "content": f"Fields ({aliases}):\n{legend}\n" + "\n".join(lines),
+        },
     ]
 
-    return get_openai_response(messages)
+
+def split_batches(lines, max_tokens=SUMMARY_BATCH_MAX_TOKENS, max_customers=SUMMARY_BATCH_MAX_CUSTOMERS, overhead=0):
+    """Group (customer_id, line) pairs so each batch fits `max_tokens` and `max_customers`."""
+    batches, batch, used = [], [], overhead
+    for customer_id, line in lines:
+        cost = count_tokens(line) + 1
+        if batch and (used + cost > max_tokens or len(batch) >= max_customers):
+            batches.append(batch)
+            batch, used = [], overhead
+        batch.append((customer_id, line))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def parse_batch_response(response):
+    """{Customer_ID: summary} from a JSON-array reply; tolerates code fences and surrounding text."""
+    start, end = response.find("["), response.rfind("]")
+    if start < 0 or end < start:
+        return None
+    try:
+        items = json.loads(response[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+    return {
+        str(item["Customer_ID"]): str(item.get("summary", ""))
+        for item in items
+        if isinstance(item, dict) and "Customer_ID" in item
+    }
+
+
+def generate_customer_summaries(customers, max_tokens=SUMMARY_BATCH_MAX_TOKENS, max_customers=SUMMARY_BATCH_MAX_CUSTOMERS):
+    """Summaries for many customers in a few LLM calls; returns {Customer_ID: summary}.
+
+    Customers without a Customer_ID are keyed by their list position.
+    Customers the model left out, or whose batch failed, get an "Error: ..." string.
+    """
+    if not customers:
+        return {}
+    fields = [field for field in customers[0] if field != "Customer_ID"]
+    lines = [
+        (str(customer.get("Customer_ID", i)), _customer_line(customer.get("Customer_ID", i), customer, fields))
+        for i, customer in enumerate(customers)
+    ]
+    overhead = message_tokens(_batch_messages(fields, []))
+    batches = split_batches(lines, max_tokens, max_customers, overhead)
+
+    messages_list = [_batch_messages(fields, [line for _, line in batch]) for batch in batches]
+    for messages in messages_list:
+        log_prompt("batch", messages)
+    responses = get_cached_openai_responses(
+        messages_list,
+        is_valid=lambda response: parse_batch_response(response) is not None,
+    )
+
+    summaries = {}
+    for batch, response in zip(batches, responses):
+        parsed = parse_batch_response(response) or {}
+        for customer_id, _ in batch:
+            if customer_id in parsed:
+                summaries[customer_id] = parsed[customer_id]
+            elif response.startswith("Error:"):
+                summaries[customer_id] = response
+            else:
+                summaries[customer_id] = "Error: no summary returned for this customer"
+    return summaries